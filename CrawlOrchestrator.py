@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+import asyncio
+import aiohttp
+import logging
+import sys
+from database.db import Database  # Importa a classe Database
+from database.session_manager import SessionManager  # Importa a classe SessionManager
+from database.scoring import move_scores
+from database.progression import compact_progression
+from TeamScraper import TeamScraper
+from PlayerScraper import PlayerScraper
+from LeagueScraper import LeagueScraper
+
+# Configuração do logger
+logging.basicConfig(filename='errors.log', level=logging.ERROR,
+                    format='%(asctime)s:%(levelname)s:%(message)s')
+
+# Roda o TeamScraper e o PlayerScraper como um pipeline único: cada clube atualizado
+# e ativo já entra na fila de elencos, e os clubes que ficaram inativos são movidos
+# em pequenos lotes, sem esperar o fim da atualização de todos os clubes.
+class CrawlOrchestrator:
+    # leagues: atualiza os clubes pelas classificações das ligas (LeagueScraper)
+    def __init__(self, streaming=False, shadow=False, leagues=False, player_workers=20, move_batch_size=50):
+        self.db = Database()
+        self.session_manager = SessionManager()
+        self.shadow = shadow
+        self.leagues = leagues
+        self.team_scraper = TeamScraper(self.session_manager, self.db)
+        self.league_scraper = LeagueScraper(self.session_manager, self.db, self.team_scraper)
+        self.player_scraper = PlayerScraper(streaming, shadow, self.session_manager, self.db)
+        self.player_workers = player_workers
+        self.move_batch_size = move_batch_size
+        self.player_queue = asyncio.Queue(maxsize=player_workers * 10)
+        self.queued_clubs = set()
+        self.inactive_clubs = []
+        self.moved_count = 0
+        self.team_scraper.on_club = self.on_club
+        self.league_scraper.on_unchanged = self.on_unchanged
+
+    # Chamado pelo TeamScraper a cada clube atualizado
+    async def on_club(self, club_id, status):
+        if status == 1:
+            if club_id not in self.queued_clubs:
+                self.queued_clubs.add(club_id)
+                await self.player_queue.put(club_id)
+        else:
+            self.inactive_clubs.append(club_id)
+            if len(self.inactive_clubs) >= self.move_batch_size:
+                await self.flush_moves()
+
+    # Move os jogadores dos clubes que ficaram inativos desde o último lote
+    async def flush_moves(self):
+        club_ids, self.inactive_clubs = self.inactive_clubs, []
+        if club_ids:
+            await asyncio.to_thread(self.move_clubs, club_ids)
+            self.moved_count += len(club_ids)
+
+    # Os jogadores movidos passam a ser pontuados na tabela de inativos
+    def move_clubs(self, club_ids):
+        table = self.player_scraper.player_table
+        move_scores(self.db, table, self.db.move_player(table, club_ids))
+
+    # Chamado pelo LeagueScraper com os clubes ativos que não mudaram na classificação:
+    # não serão atualizados neste crawl, então já podem ir para a fila de elencos
+    async def on_unchanged(self, club_ids):
+        for club_id in club_ids:
+            await self.on_club(club_id, 1)
+
+    # Clubes ativos que não passaram por nenhuma classificação lida (liga sem página,
+    # clube sem liga). Só roda depois das atualizações, quando is_active já está certo
+    async def queue_stored_clubs(self):
+        for club_id in await asyncio.to_thread(self.db.get_clubinfo):
+            await self.on_club(club_id, 1)
+
+    async def player_worker(self, session):
+        while True:
+            club_id = await self.player_queue.get()
+            try:
+                await self.player_scraper.process_club(session, club_id)
+            except Exception as e:
+                logging.error(f"Erro ao processar jogadores do clube {club_id}: {e}")
+            finally:
+                self.player_queue.task_done()
+
+    async def run(self):
+        tasks = [self.session_manager.get_cookie()]
+        if self.shadow:
+            tasks.append(asyncio.to_thread(self.db.prepare_shadow))
+        await asyncio.gather(*tasks)
+
+        async with aiohttp.ClientSession() as session:
+            workers = [asyncio.create_task(self.player_worker(session)) for _ in range(self.player_workers)]
+            try:
+                if self.leagues:
+                    # Um clube só entra na fila depois que se sabe que não vai mudar de status:
+                    # os que não mudaram, ao ler a classificação da liga; os atualizados, pelo
+                    # hook. Um clube na fila que depois ficasse inativo teria os jogadores
+                    # movidos e gravados de novo em player_active pelo worker
+                    await self.league_scraper.process_leagues(session=session)
+                    await self.queue_stored_clubs()
+                else:
+                    await self.team_scraper.find_and_process_new_clubs(session)
+                    await self.team_scraper.process_clubs(session=session)
+                await self.flush_moves()
+                await self.player_queue.join()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+        if self.shadow:
+            self.db.promote_shadow()
+        self.db.mark_players_changed()
+
+        print(f"Clubes com elenco atualizado: {len(self.queued_clubs)}. Clubes movidos para inativos: {self.moved_count}.")
+        print(f"Jogadores alterados: {self.player_scraper.changed_count}. Sem alteração: {self.player_scraper.unchanged_count}.")
+        print(f"Evolução compactada para {compact_progression(self.db)} jogadores.")
+
+# Função para iniciar o processo
+async def main():
+    orchestrator = CrawlOrchestrator(
+        streaming="--stream" in sys.argv,
+        shadow="--shadow" in sys.argv,
+        leagues="--leagues" in sys.argv
+    )
+
+    try:
+        await orchestrator.run()
+    except Exception as e:
+        print(f"Erro: {e}")
+
+# Executa o script
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+import asyncio
+import aiohttp
+from lxml import etree
+import logging
+import os
+import re
+from urllib.parse import urljoin
+from database.db import Database  # Importa a classe Database
+from database.session_manager import SessionManager  # Importa a classe SessionManager
+from TeamScraper import TeamScraper
+from datetime import datetime, timedelta
+
+# Configuração do logger
+logging.basicConfig(filename='errors.log', level=logging.ERROR,
+                    format='%(asctime)s:%(levelname)s:%(message)s')
+
+BASE_URL = "https://www.dugout-online.com/"
+
+# Página de classificação de uma liga (com {league_id}). Se não estiver no .env, é
+# montada a partir do link da liga na página de um clube (o mesmo link de onde o
+# TeamScraper tira o league_id)
+LEAGUE_URL = os.getenv("LEAGUE_URL")
+
+CLUB_LINK = re.compile(r'clubinfo/none/clubid/(\d+)')
+
+# Dias sem atividade para um clube passar a inativo (o mesmo limite do TeamScraper)
+INACTIVE_DAYS = 50
+
+# Atualiza os clubes a partir das classificações das ligas: uma página traz todos os
+# clubes da liga, e só os clubes cujos dados de liga mudaram (ou que estão para ficar
+# inativos) têm a página individual buscada.
+class LeagueScraper:
+    def __init__(self, session_manager=None, db=None, team_scraper=None):
+        self.session_manager = session_manager or SessionManager()
+        self.db = db or Database()
+        self.team_scraper = team_scraper or TeamScraper(self.session_manager, self.db)
+        self.league_url = LEAGUE_URL
+        self.league_count = 0
+        self.club_count = 0
+        self.refreshed_count = 0
+        # Chamado (async) com os clubes ativos de uma liga que não precisam da página
+        # individual, assim que a classificação é lida; usado pelo CrawlOrchestrator
+        self.on_unchanged = None
+
+    #Faz o login (ou reaproveita o cookie salvo) e obtém o cookie PHPSESSID
+    async def initialize(self):
+        await self.session_manager.get_cookie()
+
+    # Monta o modelo da URL da liga a partir do link da liga na página de um clube
+    def extract_league_url(self, html, league_id):
+        dom = etree.HTML(html)
+        for href in dom.xpath("//td[@class='matches_row1_nh'][2]//a/@href"):
+            parts = urljoin(BASE_URL, href).split('/')
+            if len(parts) > 7 and parts[7] == str(league_id):
+                parts[7] = '{league_id}'
+                return '/'.join(parts)
+        return None
+
+    async def resolve_league_url(self, session, stored):
+        if self.league_url:
+            return self.league_url
+        for club_id, (_, league_id, _, is_active) in stored.items():
+            if is_active == 1 and league_id:
+                html_content = await self.session_manager.fetch_page(session, f"{BASE_URL}clubinfo/none/clubid/{club_id}")
+                if html_content:
+                    self.league_url = self.extract_league_url(html_content, league_id)
+                return self.league_url
+        return None
+
+    # Extrai {club_id: team_name} da tabela de classificação: a tabela da página com mais
+    # clubes diferentes, o que deixa de fora links soltos do cabeçalho, menu e laterais
+    def extract_league_clubs(self, html):
+        try:
+            dom = etree.HTML(html)
+            tables = {}
+            for link in dom.xpath("//table//a[contains(@href, 'clubinfo/none/clubid/')]"):
+                match = CLUB_LINK.search(link.get('href'))
+                team_name = link.xpath("string()").strip()
+                if match and team_name:
+                    table = link.xpath("ancestor::table[1]")[0]
+                    tables.setdefault(table, {}).setdefault(int(match.group(1)), team_name)
+            clubs = max(tables.values(), key=len, default={})
+            # Uma tabela com um clube só não é uma classificação
+            return clubs if len(clubs) > 1 else {}
+        except Exception as e:
+            logging.error(f"Exception caught for league page: {str(e)}")
+            return {}
+
+    # Clube com last_active guardado há INACTIVE_DAYS dias ou mais
+    def is_due(self, last_active):
+        try:
+            last_active = datetime.strptime(str(last_active)[:10], '%Y-%m-%d')
+        except ValueError:
+            return True
+        return datetime.now() - last_active >= timedelta(days=INACTIVE_DAYS)
+
+    # Decide quais clubes de uma liga precisam da página individual
+    def clubs_to_refresh(self, league_id, clubs, stored):
+        refresh = set()
+        for club_id, team_name in clubs.items():
+            info = stored.get(club_id)
+            if info is None:
+                refresh.add(club_id)  # Clube novo
+                continue
+            stored_name, stored_league, last_active, is_active = info
+            if stored_name != team_name or stored_league != league_id:
+                refresh.add(club_id)  # Mudou de nome (novo técnico) ou de liga
+            elif is_active == 1 and self.is_due(last_active):
+                refresh.add(club_id)  # Pode ter ficado inativo
+
+        # Clubes guardados nesta liga que não aparecem mais na classificação
+        for club_id, (_, stored_league, _, _) in stored.items():
+            if stored_league == league_id and club_id not in clubs:
+                refresh.add(club_id)
+        return refresh
+
+    async def process_league(self, session, league_id, stored):
+        url = self.league_url.format(league_id=league_id)
+        html_content = await self.session_manager.fetch_page(session, url)
+        if not html_content:
+            print(f"Nenhuma classificação encontrada para a liga {league_id}. Pulando atualização.")
+            return set()
+
+        clubs = self.extract_league_clubs(html_content)
+        if not clubs:
+            print(f"Nenhum clube encontrado na liga {league_id}. Pulando atualização.")
+            return set()
+
+        self.league_count += 1
+        self.club_count += len(clubs)
+        refresh = self.clubs_to_refresh(league_id, clubs, stored)
+        if self.on_unchanged:
+            await self.on_unchanged([
+                club_id for club_id in clubs
+                if club_id not in refresh and stored[club_id][3] == 1
+            ])
+        return refresh
+
+    # Busca as classificações em lotes e depois as páginas dos clubes que mudaram
+    async def process_leagues(self, batch_size=20, session=None):
+        if session is None:
+            async with aiohttp.ClientSession() as session:
+                return await self.process_leagues(batch_size, session)
+
+        stored = self.db.get_league_clubinfo()
+        league_ids = self.db.get_league_ids()
+
+        if league_ids and not await self.resolve_league_url(session, stored):
+            return await self.fallback(session, batch_size, "não foi possível montar a URL das ligas (defina LEAGUE_URL)")
+
+        refresh = set()
+        for i in range(0, len(league_ids), batch_size):
+            tasks = [self.process_league(session, league_id, stored) for league_id in league_ids[i:i + batch_size]]
+            for clubs in await asyncio.gather(*tasks):
+                refresh |= clubs
+
+        # Nenhuma classificação lida: a URL está errada ou a página mudou
+        if league_ids and self.league_count == 0:
+            return await self.fallback(session, batch_size, f"nenhuma das {len(league_ids)} ligas retornou clubes em {self.league_url}")
+
+        refresh = sorted(refresh)
+        for i in range(0, len(refresh), batch_size):
+            tasks = [self.team_scraper.process_club(session, club_id) for club_id in refresh[i:i + batch_size]]
+            await asyncio.gather(*tasks)
+
+        self.refreshed_count += len(refresh)
+        print(f"Ligas lidas: {self.league_count}. Clubes nas classificações: {self.club_count}. Páginas de clube buscadas: {len(refresh)}.")
+        return refresh
+
+    # Sem classificações não dá para saber quais clubes mudaram: atualiza todos os
+    # clubes ativos, um por um, como o TeamScraper
+    async def fallback(self, session, batch_size, reason):
+        logging.error(f"Atualização por ligas falhou: {reason}. Atualizando todos os clubes.")
+        print(f"ATENÇÃO: atualização por ligas falhou ({reason}). Atualizando todos os clubes individualmente.")
+        await self.team_scraper.process_clubs(batch_size, session)
+        return None
+
+# Função para iniciar o processo
+async def main():
+    scraper = LeagueScraper()
+
+    try:
+        # Inicializa o scraper (faz o login)
+        await scraper.initialize()
+
+        await scraper.process_leagues()
+
+        scraper.team_scraper.move_players()
+    except Exception as e:
+        print(f"Erro: {e}")
+
+# Executa o script
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+import sys
+from database.db import Database  # Importa a classe Database
+from database.migrate import migrate, check_indexes
+
+def main():
+    db = Database()
+
+    if "--check" in sys.argv:
+        # Falha se alguma consulta conhecida fizer leitura completa de tabela
+        failures = check_indexes(db)
+        for name, tables in failures.items():
+            print(f"Leitura completa em {name}: {', '.join(tables)}")
+        if failures:
+            sys.exit(1)
+        print("Todas as consultas conhecidas usam índice.")
+        return
+
+    pending = migrate(db)
+    if not pending:
+        print("Schema já está atualizado.")
+
+if __name__ == "__main__":
+    main()
@@ -5,43 +5,95 @@ from bs4 import BeautifulSoup
 from lxml import etree
 import logging
 import re
+import sys
 from database.db import Database  # Importa a classe Database
-from database.login_manager import LoginManager  # Importa a classe LoginManager
+from database.session_manager import SessionManager  # Importa a classe SessionManager
+from database.scoring import refresh_scores
+from database.progression import compact_progression
+from datetime import date
 
 # Configuração do logger
 logging.basicConfig(filename='errors.log', level=logging.ERROR,
                     format='%(asctime)s:%(levelname)s:%(message)s')
 
+# Extrai os jogadores enquanto a página chega, liberando cada linha já processada
+class PlayerStreamParser:
+    def __init__(self, scraper, club_id):
+        self.scraper = scraper
+        self.club_id = club_id
+        self.parser = etree.HTMLPullParser(events=('end',), tag=('tr', 'input'))
+        self.players = []
+        self.logged_out = False
+        self.failed = False
+
+    def feed(self, chunk):
+        self.parser.feed(chunk)
+        self.read_events()
+
+    def close(self):
+        self.parser.close()
+        self.read_events()
+        return [] if self.failed else self.players
+
+    def read_events(self):
+        for _, element in self.parser.read_events():
+            if element.tag == 'input':
+                if element.get('name') in ('do_user', 'do_pass'):
+                    self.logged_out = True
+                continue
+
+            row_class = element.get('class', '')
+            if 'matches_row1' not in row_class and 'matches_row2' not in row_class:
+                continue
+
+            if not self.failed:
+                try:
+                    player = self.scraper.extract_player_row(element, self.club_id)
+                    if player:
+                        self.players.append(player)
+                except Exception as e:
+                    logging.error(f"Exception caught for club {self.club_id}: {str(e)}")
+                    self.failed = True
+
+            # Libera a linha e as anteriores, que já foram processadas
+            element.clear()
+            parent = element.getparent()
+            while parent is not None and element.getprevious() is not None:
+                del parent[0]
+
 class PlayerScraper:
-    def __init__(self):
-        self.session_cookie = None
-        self.db = Database()
-        self.active_players = self.db.get_all_players_and_attributes()
-
-    #Faz o login e obtém o cookie PHPSESSID
-    async def initialize(self):
-        login_manager = LoginManager()
-        self.session_cookie = await login_manager.login()
-        print(f"Cookie PHPSESSID obtido: {self.session_cookie}")
-
-    # Busca a página HTML de um clube
+    # shadow: escreve em cópias das tabelas ativas e troca tudo de uma vez no fim do crawl
+    def __init__(self, streaming=False, shadow=False, session_manager=None, db=None):
+        self.streaming = streaming
+        self.shadow = shadow
+        self.player_table = 'active_shadow' if shadow else 'active'
+        self.session_manager = session_manager or SessionManager()
+        self.db = db or Database()
+        self.clubinfo = None
+        self.changed_count = 0
+        self.unchanged_count = 0
+        # Data dos snapshots de evolução gravados neste crawl
+        self.crawl_date = date.today().isoformat()
+
+    #Faz o login e busca a lista de clubes ao mesmo tempo; o snapshot é carregado por clube sob demanda
+    async def initialize(self, clubs=None):
+        tasks = [
+            self.session_manager.get_cookie(),
+            asyncio.to_thread(self.db.get_clubinfo, clubs)
+        ]
+        if self.shadow:
+            tasks.append(asyncio.to_thread(self.db.prepare_shadow))
+        _, self.clubinfo, *_ = await asyncio.gather(*tasks)
+
+    # Busca a página HTML de um clube (refaz o login se a sessão expirar)
     async def fetch_page(self, session, url, retries=3):
-        cookies = {"PHPSESSID": self.session_cookie}
-        for attempt in range(retries):
-            try:
-                async with session.get(url, cookies=cookies, timeout=10) as response:
-                    if response.status == 200:
-                        return await response.text(errors="ignore")
-                    else:
-                        logging.error(f"Erro ao buscar a página do clube {url}: {response.status}")
-                        return None
-            except asyncio.TimeoutError:
-                logging.error(f"Timeout na requisição do clube {url}, tentativa {attempt + 1}")
-                if attempt + 1 == retries:
-                    return None  # Retorna None após o número máximo de tentativas
-            except Exception as e:
-                logging.error(f"Erro na requisição do clube {url}: {e}")
-                return None
+        return await self.session_manager.fetch_page(session, url, retries)
+
+    # Busca a página já extraindo os jogadores de forma incremental
+    async def fetch_players(self, session, url, club_id, retries=3):
+        return await self.session_manager.fetch_page(
+            session, url, retries, parser_factory=lambda: PlayerStreamParser(self, club_id)
+        )
 
     # Extrai informações dos jogadores da página HTML
     def extract_player_info(self, html, club_id):
@@ -51,39 +103,45 @@ class PlayerScraper:
             dom = etree.HTML(str(soup))
             elements = dom.xpath('//tr[contains(@class, "matches_row1") or contains(@class, "matches_row2")]')
             for element in elements:
-                i = 1
-                name = element.xpath('./td[' + str(3 + i) + ']//a/text()')[0]
-                if "(Loaned out)" in name:
-                    continue
-                position = element.xpath('./td[' + str(1 + i) + ']//div/text()')[0]
-                age = element.xpath('./td[' + str(4 + i) + ']//span/text()')[0]
-                nationality_img = element.xpath('./td[' + str(5 + i) + ']/img/@src')[0]
-                nationality_code = nationality_img[-7:-4]
-                rating = element.xpath('./td[' + str(6 + i) + ']/span/text()')[0]
-
-                player_url = element.xpath('./td[' + str(3 + i) + ']//a/@href')[0]
-                player_id_match = re.search(r'playerID/(\d+)', player_url)
-                player_id = player_id_match.group(1) if player_id_match else None
-
-                attributesArray = element.xpath('./td[' + str(2 + i) + ']//div//div//table//span/text()')
-                attributes = [int(attr) for attr in attributesArray]
-
-                players.append({
-                    'id': player_id,
-                    'club_id': club_id,
-                    'name': name,
-                    'position': position,
-                    'nationality': nationality_code,
-                    'age': age,
-                    'rating': rating,
-                    'attributes': attributes
-                })
+                player = self.extract_player_row(element, club_id)
+                if player:
+                    players.append(player)
 
             return players
         except Exception as e:
             logging.error(f"Exception caught for club {club_id}: {str(e)}")
             return []
 
+    # Extrai um jogador de uma linha da tabela do elenco
+    def extract_player_row(self, element, club_id):
+        i = 1
+        name = element.xpath('./td[' + str(3 + i) + ']//a/text()')[0]
+        if "(Loaned out)" in name:
+            return None
+        position = element.xpath('./td[' + str(1 + i) + ']//div/text()')[0]
+        age = element.xpath('./td[' + str(4 + i) + ']//span/text()')[0]
+        nationality_img = element.xpath('./td[' + str(5 + i) + ']/img/@src')[0]
+        nationality_code = nationality_img[-7:-4]
+        rating = element.xpath('./td[' + str(6 + i) + ']/span/text()')[0]
+
+        player_url = element.xpath('./td[' + str(3 + i) + ']//a/@href')[0]
+        player_id_match = re.search(r'playerID/(\d+)', player_url)
+        player_id = player_id_match.group(1) if player_id_match else None
+
+        attributesArray = element.xpath('./td[' + str(2 + i) + ']//div//div//table//span/text()')
+        attributes = [int(attr) for attr in attributesArray]
+
+        return {
+            'id': player_id,
+            'club_id': club_id,
+            'name': name,
+            'position': position,
+            'nationality': nationality_code,
+            'age': age,
+            'rating': rating,
+            'attributes': attributes
+        }
+
     # Processa as informações de um clube
     async def process_club(self, session, club_id):
         base_url = "https://www.dugout-online.com"
@@ -92,15 +150,25 @@ class PlayerScraper:
             f"{base_url}/players/none/view/youth/clubid/{club_id}"
         ]
 
-        tasks = [self.fetch_page(session, url) for url in urls]
-        results = await asyncio.gather(*tasks)
+        # O snapshot do clube é lido do banco enquanto as páginas são baixadas
+        if self.streaming:
+            tasks = [self.fetch_players(session, url, club_id) for url in urls]
+        else:
+            tasks = [self.fetch_page(session, url) for url in urls]
+        tasks.append(asyncio.to_thread(self.db.get_players_and_attributes_by_club, club_id, self.player_table))
+        *results, rows = await asyncio.gather(*tasks)
+        snapshot = self.build_snapshot(rows)
 
         for html_content in results:
-            if html_content:
-                players = self.extract_player_info(html_content, club_id)
+            if html_content is not None:
+                players = html_content if self.streaming else self.extract_player_info(html_content, club_id)
                 if players:
-                    self.update_players_and_attributes(players)
-                    print(f"Clube {club_id} atualizado com sucesso.")
+                    # As escritas do clube rodam numa thread (cada consulta abre sua conexão),
+                    # sem parar o event loop dos outros clubes
+                    changed = await asyncio.to_thread(self.update_players_and_attributes, players, snapshot)
+                    self.changed_count += changed
+                    self.unchanged_count += len(players) - changed
+                    print(f"Clube {club_id} atualizado com sucesso. {changed} alterados, {len(players) - changed} sem alteração.")
                     #logging.error(f"Clube {club_id} atualizado com sucesso.")
                 else:
                     print(f"Nenhum jogador encontrado para o clube {club_id}. Pulando atualização.")
@@ -108,23 +176,35 @@ class PlayerScraper:
             else:
                 logging.error(f"Falha ao processar clube {club_id}. Tentando novamente...")
 
-    # Atualiza os jogadores e atributos no banco de dados
-    def update_players_and_attributes(self, players):
-        player_table = 'active'
+    # Impressão digital compacta da linha do jogador, normalizando os tipos do HTML e do banco
+    def player_fingerprint(self, club_id, name, position, nationality, age, rating):
+        return hash((int(club_id), str(name), str(position), str(nationality), int(age), round(float(rating), 2)))
+
+    # Converte as linhas do banco em {id: (impressão digital, atributos)}
+    def build_snapshot(self, rows):
+        snapshot = {}
+        for player_id, row in rows.items():
+            attributes = tuple(row[6:]) if row[6] is not None else None
+            snapshot[player_id] = (self.player_fingerprint(*row[:6]), attributes)
+        return snapshot
+
+    # Atualiza no banco só os jogadores e atributos novos ou alterados; retorna quantos mudaram
+    def update_players_and_attributes(self, players, snapshot):
+        player_table = self.player_table
         players_data = []
         attributes_data = []
+        progression_data = []
+        history_data = []
+        changed = 0
+
+        # Jogadores que chegaram de outro clube não estão no snapshot deste clube
+        missing = [int(p['id']) for p in players if int(p['id']) not in snapshot]
+        snapshot.update(self.build_snapshot(self.db.get_players_and_attributes_by_ids(missing, player_table)))
 
         for player_data in players:
             player_id = int(player_data['id'])
-            new_attributes = player_data['attributes']
-
-            # Verifica se o jogador já existe na memória
-            if player_id in self.active_players:
-                old_attributes = self.active_players[player_id]
-                self.log_attribute_changes(player_id, old_attributes, new_attributes)
-
-            # Prepara os dados para atualização
-            players_data.append((
+            new_attributes = tuple(player_data['attributes'])
+            player_row = (
                 player_id,
                 player_data['club_id'],
                 player_data['name'],
@@ -132,33 +212,65 @@ class PlayerScraper:
                 player_data['nationality'],
                 player_data['age'],
                 player_data['rating']
-            ))
-            attributes_data.append((player_id, *new_attributes))
+            )
+            fingerprint = self.player_fingerprint(*player_row[1:])
+            old_fingerprint, old_attributes = snapshot.get(player_id, (None, None))
+
+            # Verifica se o jogador já existe no snapshot
+            if old_attributes is not None:
+                history_data.extend(self.attribute_changes(player_id, old_attributes, new_attributes))
+
+            # Prepara só o que mudou para atualização
+            if fingerprint != old_fingerprint:
+                players_data.append(player_row)
+            if new_attributes != old_attributes:
+                attributes_data.append((player_id, *new_attributes))
+                progression_data.append((
+                    player_id,
+                    self.crawl_date,
+                    ','.join(str(value) for value in new_attributes),
+                    ','.join(str(value) for value in old_attributes) if old_attributes is not None else None
+                ))
+            if fingerprint != old_fingerprint or new_attributes != old_attributes:
+                changed += 1
 
             # Atualiza os dados em memória
-            self.active_players[player_id] = new_attributes
+            snapshot[player_id] = (fingerprint, new_attributes)
 
         # Atualiza jogadores e atributos em lote
-        self.db.update_players_batch(player_table, players_data)
-        self.db.update_attributes_batch(player_table, attributes_data)
+        if players_data:
+            self.db.update_players_batch(player_table, players_data)
+        if attributes_data:
+            self.db.update_attributes_batch(player_table, attributes_data)
+            self.db.log_progression_batch(progression_data)
+        if history_data:
+            self.db.log_attribute_changes_batch(history_data)
+        if players_data or attributes_data:
+            changed_ids = {row[0] for row in players_data} | {row[0] for row in attributes_data}
+            refresh_scores(self.db, player_table, sorted(changed_ids))
 
-    # Registra alterações nos atributos no histórico
-    def log_attribute_changes(self, player_id, old_attributes, new_attributes):
+        return changed
+
+    # Alterações nos atributos para o histórico, como (player_id, coluna, valor antigo)
+    def attribute_changes(self, player_id, old_attributes, new_attributes):
+        changes = []
         for i, (old_value, new_value) in enumerate(zip(old_attributes, new_attributes)):
             if old_value != new_value:
                 column_name = [
                     'Ref', 'Tck', 'Cre', 'Sht', 'Tmw', 'One', 'Mrk', 'Pas', 'Dri', 'Sp', 
                     'Hnd', 'Hea', 'Lsh', 'Psn', 'Str', 'Com', 'Crs', 'Fto', 'Agg', 'Inf', 'Ecc'
                 ][i]
-                self.db.log_attribute_change(player_id, column_name, old_value)
+                changes.append((player_id, column_name, old_value))
+        return changes
 
     # Processa todos os clubes em lotes
     async def process_players(self, batch_size=20):
-        clubinfo = self.db.get_clubinfo()
+        if self.clubinfo is None:
+            self.clubinfo = self.db.get_clubinfo()
 
         async with aiohttp.ClientSession() as session:
             tasks = []
-            for club_id in clubinfo:
+            for club_id in self.clubinfo:
                 tasks.append(self.process_club(session, club_id))
 
                 if len(tasks) >= batch_size:
@@ -168,13 +280,24 @@ class PlayerScraper:
             if tasks:
                 await asyncio.gather(*tasks)
 
+        print(f"Jogadores alterados: {self.changed_count}. Sem alteração: {self.unchanged_count}.")
+        if self.shadow:
+            self.db.promote_shadow()
+        self.db.mark_players_changed()
+        print(f"Evolução compactada para {compact_progression(self.db)} jogadores.")
+
 # Função para iniciar o processo
 async def main():
     # Instancia o PlayerScraper
-    scraper = PlayerScraper()
+    if "--rollback" in sys.argv:
+        # Volta as tabelas ativas para a geração anterior ao último crawl em modo shadow
+        Database().rollback_shadow()
+        return
+
+    scraper = PlayerScraper(streaming="--stream" in sys.argv, shadow="--shadow" in sys.argv)
 
     try:
-        # Inicializa o scraper (faz o login)
+        # Inicializa o scraper (faz o login e busca os clubes)
         await scraper.initialize()
 
         # Processa os jogadores
@@ -6,7 +6,8 @@ from lxml import etree
 import logging
 import re
 from database.db import Database  # Importa a classe Database
-from database.login_manager import LoginManager  # Importa a classe LoginManager
+from database.session_manager import SessionManager  # Importa a classe SessionManager
+from database.scoring import refresh_scores
 
 # Configuração do logger
 logging.basicConfig(filename='errors.log', level=logging.ERROR,
@@ -14,33 +15,16 @@ logging.basicConfig(filename='errors.log', level=logging.ERROR,
 
 class PlayerScraperInactive:
     def __init__(self):
-        self.session_cookie = None
+        self.session_manager = SessionManager()
         self.db = Database()
 
-    #Faz o login e obtém o cookie PHPSESSID
+    #Faz o login (ou reaproveita o cookie salvo) e obtém o cookie PHPSESSID
     async def initialize(self):
-        login_manager = LoginManager()
-        self.session_cookie = await login_manager.login()
-        print(f"Cookie PHPSESSID obtido: {self.session_cookie}")
+        await self.session_manager.get_cookie()
 
-    # Busca a página HTML de um clube
+    # Busca a página HTML de um clube (refaz o login se a sessão expirar)
     async def fetch_page(self, session, url, retries=3):
-        cookies = {"PHPSESSID": self.session_cookie}
-        for attempt in range(retries):
-            try:
-                async with session.get(url, cookies=cookies, timeout=10) as response:
-                    if response.status == 200:
-                        return await response.text(errors="ignore")
-                    else:
-                        logging.error(f"Erro ao buscar a página do clube {url}: {response.status}")
-                        return None
-            except asyncio.TimeoutError:
-                logging.error(f"Timeout na requisição do clube {url}, tentativa {attempt + 1}")
-                if attempt + 1 == retries:
-                    return None  # Retorna None após o número máximo de tentativas
-            except Exception as e:
-                logging.error(f"Erro na requisição do clube {url}: {e}")
-                return None
+        return await self.session_manager.fetch_page(session, url, retries)
 
     # Extrai informações dos jogadores da página HTML
     def extract_player_info(self, html, club_id):
@@ -149,6 +133,9 @@ class PlayerScraperInactive:
             if tasks:
                 await asyncio.gather(*tasks)
 
+        refresh_scores(self.db, 'inactive')
+        self.db.mark_players_changed()
+
 # Função para iniciar o processo
 async def main():
     # Instancia o PlayerScraperInactive
@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+from database.db import Database  # Importa a classe Database
+from database.scoring import SCORING_PROFILES, refresh_scores
+
+def main():
+    db = Database()
+
+    # Recalcula todas as pontuações guardadas (usar depois de criar ou alterar um perfil)
+    for table in ('active', 'inactive'):
+        refresh_scores(db, table)
+        print(f"Pontuações de {table} atualizadas para os perfis: {', '.join(SCORING_PROFILES)}.")
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,8 @@ from bs4 import BeautifulSoup
 from lxml import etree
 import logging
 from database.db import Database  # Importa a classe Database
-from database.login_manager import LoginManager  # Importa a classe LoginManager
+from database.session_manager import SessionManager  # Importa a classe SessionManager
+from database.scoring import move_scores
 from datetime import datetime
 import time
 
@@ -14,34 +15,19 @@ logging.basicConfig(filename='errors.log', level=logging.ERROR,
                     format='%(asctime)s:%(levelname)s:%(message)s')
 
 class TeamScraper:
-    def __init__(self):
-        self.session_cookie = None
-        self.db = Database()
+    def __init__(self, session_manager=None, db=None):
+        self.session_manager = session_manager or SessionManager()
+        self.db = db or Database()
+        # Chamado (async) com (club_id, status) a cada clube atualizado; usado pelo CrawlOrchestrator
+        self.on_club = None
 
-    #Faz o login e obtém o cookie PHPSESSID
+    #Faz o login (ou reaproveita o cookie salvo) e obtém o cookie PHPSESSID
     async def initialize(self):
-        login_manager = LoginManager()
-        self.session_cookie = await login_manager.login()
-        print(f"Cookie PHPSESSID obtido: {self.session_cookie}")
+        await self.session_manager.get_cookie()
 
-    # Busca a página HTML de um clube
+    # Busca a página HTML de um clube (refaz o login se a sessão expirar)
     async def fetch_page(self, session, url, retries=3):
-        cookies = {"PHPSESSID": self.session_cookie}
-        for attempt in range(retries):
-            try:
-                async with session.get(url, cookies=cookies, timeout=10) as response:
-                    if response.status == 200:
-                        return await response.text(errors="ignore")
-                    else:
-                        logging.error(f"Erro ao buscar a página do clube {url}: {response.status}")
-                        return None
-            except asyncio.TimeoutError:
-                logging.error(f"Timeout na requisição do clube {url}, tentativa {attempt + 1}")
-                if attempt + 1 == retries:
-                    return None  # Retorna None após o número máximo de tentativas
-            except Exception as e:
-                logging.error(f"Erro na requisição do clube {url}: {e}")
-                return None
+        return await self.session_manager.fetch_page(session, url, retries)
 
     #Funçao para extrair o html da pagina
     def extract_club_info(self, html):
@@ -123,6 +109,7 @@ class TeamScraper:
         results = await asyncio.gather(*tasks)
         null_count = 0  # Contador de nulls consecutivos
         change_date = datetime.now().strftime('%Y-%m-%d')
+        status = None
 
         for html_content in results:
             if html_content:
@@ -149,32 +136,42 @@ class TeamScraper:
                     club_extracted['last_active'],
                     status
                 ))
-                self.db.update_club_info(club)
+                await asyncio.to_thread(self.db.update_club_info, club)
                 
                 print(f"Clube {club_id} atualizado com sucesso.")
                 #logging.error(f"Clube {club_id} atualizado com sucesso.")
+                if self.on_club:
+                    await self.on_club(club_id, status)
             else:
                 print(f"Nenhum jogador encontrado para o clube {club_id}. Pulando atualização.")
                 #logging.error(f"Nenhum jogador encontrado para o clube {club_id}. Pulando atualização.")
 
+        return status
+
     # Processa todos os clubes em lotes
-    async def process_clubs(self, batch_size=20):
-        self.clubinfo = self.db.get_clubinfo()
+    async def process_clubs(self, batch_size=20, session=None):
+        if session is None:
+            async with aiohttp.ClientSession() as session:
+                return await self.process_clubs(batch_size, session)
 
-        async with aiohttp.ClientSession() as session:
-            tasks = []
-            for club_id in self.clubinfo:
-                tasks.append(self.process_club(session, club_id))
+        self.clubinfo = self.db.get_clubinfo()
 
-                if len(tasks) >= batch_size:
-                    await asyncio.gather(*tasks)
-                    tasks = []
+        tasks = []
+        for club_id in self.clubinfo:
+            tasks.append(self.process_club(session, club_id))
 
-            if tasks:
+            if len(tasks) >= batch_size:
                 await asyncio.gather(*tasks)
+                tasks = []
+
+        if tasks:
+            await asyncio.gather(*tasks)
 
     def move_players(self):
-        self.db.move_player()
+        moved_ids = self.db.move_player()
+        # Os jogadores movidos passam a ser pontuados na tabela de inativos
+        move_scores(self.db, 'active', moved_ids)
+        self.db.mark_players_changed()
 
     def find_missing_clubs(self):        
         # Pega os IDs existentes no banco
@@ -205,27 +202,30 @@ class TeamScraper:
 
         return missing_clubs
     
-    async def find_and_process_new_clubs(self):
+    async def find_and_process_new_clubs(self, session=None):
+        if session is None:
+            async with aiohttp.ClientSession() as session:
+                return await self.find_and_process_new_clubs(session)
+
         last_id = self.db.get_max_club_id()
         batch_size = 20
 
-        async with aiohttp.ClientSession() as session:
-            while True:
-                tasks = []
-                ids = list(range(last_id + 1, last_id + 1 + batch_size))
-                print(f"Verificando clubes de {ids[0]} a {ids[-1]}")
+        while True:
+            tasks = []
+            ids = list(range(last_id + 1, last_id + 1 + batch_size))
+            print(f"Verificando clubes de {ids[0]} a {ids[-1]}")
 
-                for club_id in ids:
-                    tasks.append(self.process_club(session, club_id))
+            for club_id in ids:
+                tasks.append(self.process_club(session, club_id))
 
-                results = await asyncio.gather(*tasks)
-                last_updated_id = self.db.get_max_club_id()
+            results = await asyncio.gather(*tasks)
+            last_updated_id = self.db.get_max_club_id()
 
-                if last_updated_id == last_id:
-                    print("Nenhum clube válido encontrado no último batch. Encerrando.")
-                    break
+            if last_updated_id == last_id:
+                print("Nenhum clube válido encontrado no último batch. Encerrando.")
+                break
 
-                last_id = last_updated_id
+            last_id = last_updated_id
 
 # Função para iniciar o processo
 async def main():
@@ -0,0 +1,144 @@
+import asyncio
+import os
+from quart import Quart, render_template, request, jsonify
+from dotenv import load_dotenv
+import aiomysql
+from database.player_index import PlayerIndex
+from database.scoring import SCORING_PROFILES
+from database.search import parse_search_form, parse_similar_form, build_query
+from database.progression import history_query, decode_history, parse_improvers_args, improvers_query
+from database.export import EXPORT_PAGE_SIZE, EXPORT_CHUNK_SIZE, parse_export_args, export_query
+
+# Load environment variables
+load_dotenv()
+
+# Mesmo formulário e templates do app_mysql, servido via ASGI com driver MySQL assíncrono:
+# as buscas esperam o banco sem prender um worker
+app = Quart(__name__)
+player_index = PlayerIndex()
+
+@app.before_serving
+async def create_pool():
+    app.pool = await aiomysql.create_pool(
+        host=os.environ.get("MYSQL_HOST"),
+        user=os.environ.get("MYSQL_USER"),
+        password=os.environ.get("MYSQL_PASSWORD"),
+        db=os.environ.get("MYSQL_DB"),
+        minsize=1,
+        maxsize=int(os.environ.get("MYSQL_POOL_SIZE") or 20),
+        autocommit=True
+    )
+
+@app.after_serving
+async def close_pool():
+    app.pool.close()
+    await app.pool.wait_closed()
+
+@app.context_processor
+async def inject_form():
+    return {'profiles': list(SCORING_PROFILES), 'form': await request.form}
+
+@app.route('/')
+async def index():
+    return await render_template('index.html')
+
+@app.route('/consultar', methods=['POST'])
+async def consultar():
+    query_data = build_query(**parse_search_form(await request.form))
+
+    try:
+        async with app.pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(query_data['sql'], query_data['params'])
+                resultados = await cursor.fetchall()
+    except aiomysql.Error as e:
+        return await render_template('index.html', error=f"Erro ao acessar o banco de dados: {e}")
+
+    return await render_template('index.html', resultados=resultados)
+
+@app.route('/similares', methods=['GET', 'POST'])
+async def similares():
+    values = await request.values
+    search = parse_similar_form(values)
+    if not search:
+        return await render_template('index.html', error="Informe o ID do jogador.")
+
+    # O índice é em memória; a carga inicial (síncrona) roda fora do event loop
+    try:
+        resultados = await asyncio.to_thread(lambda: player_index.similar(**search))
+    except Exception as e:
+        return await render_template('index.html', error=f"Erro ao acessar o banco de dados: {e}")
+
+    if resultados is None:
+        return await render_template('index.html', error=f"Jogador {search['player_id']} não encontrado.")
+    if values.get('format') == 'json':
+        return jsonify(resultados)
+
+    return await render_template('index.html', resultados=resultados, similar=True)
+
+async def fetch_all(query_data):
+    async with app.pool.acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(query_data['sql'], query_data['params'])
+            return await cursor.fetchall()
+
+# Evolução dos atributos de um jogador, a partir da série compacta
+@app.route('/progressao/<int:player_id>')
+async def progressao(player_id):
+    try:
+        rows = await fetch_all(history_query(player_id))
+    except aiomysql.Error as e:
+        return jsonify(error=f"Erro ao acessar o banco de dados: {e}"), 500
+
+    if not rows:
+        return jsonify(error=f"Sem evolução registrada para o jogador {player_id}."), 404
+    return jsonify(decode_history(player_id, rows[0]['series']))
+
+# Jogadores que mais evoluíram no período (start, end, k, position)
+@app.route('/progressao')
+async def melhores_progressoes():
+    args = parse_improvers_args(request.args)
+    try:
+        rows = await fetch_all(improvers_query(**args))
+    except aiomysql.Error as e:
+        return jsonify(error=f"Erro ao acessar o banco de dados: {e}"), 500
+
+    return jsonify({**args, 'players': [{**row, 'gain': int(row['gain'])} for row in rows]})
+
+# Exporta jogadores e atributos com os filtros da busca (ou a base ativa/inativa inteira)
+# em csv, ndjson ou parquet. Cada página usa um cursor sem buffer e devolve a conexão ao pool
+@app.route('/exportar', methods=['GET', 'POST'])
+async def exportar():
+    try:
+        export_format, filters = parse_export_args(await request.values)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    async def generate():
+        yield export_format.start()
+        after_id = 0
+        while True:
+            query = export_query(**filters, after_id=after_id, limit=EXPORT_PAGE_SIZE)
+            count = 0
+            async with app.pool.acquire() as conn:
+                async with conn.cursor(aiomysql.SSCursor) as cursor:
+                    await cursor.execute(query['sql'], query['params'])
+                    while True:
+                        rows = await cursor.fetchmany(EXPORT_CHUNK_SIZE)
+                        if not rows:
+                            break
+                        count += len(rows)
+                        after_id = rows[-1][0]
+                        yield export_format.encode(rows)
+            if count < EXPORT_PAGE_SIZE:
+                break
+        yield export_format.finish()
+
+    table = 'ativos' if filters['player_table'] == 'player_active' else 'inativos'
+    return generate(), 200, {
+        'Content-Type': export_format.mimetype,
+        'Content-Disposition': f"attachment; filename=jogadores_{table}.{export_format.extension}",
+    }
+
+if __name__ == '__main__':
+    app.run(host='127.0.0.1', port=4000)
@@ -1,24 +1,25 @@
 import os
-from flask import Flask, render_template, request
+from flask import Flask, Response, render_template, request, jsonify
 from dotenv import load_dotenv
 import mysql.connector
 from mysql.connector import Error
+from database.player_index import PlayerIndex
+from database.scoring import SCORING_PROFILES
+from database.search import parse_search_form, parse_similar_form, build_query
+from database.progression import history_query, decode_history, parse_improvers_args, improvers_query
+from database.db import Database
+from database.export import parse_export_args, iter_export
 
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
+player_index = PlayerIndex()
+db = Database()
 
-VALID_POSITIONS = {
-    'GK', 'DC', 'DL', 'DR', 'ML', 'MR', 'MC', 'FL', 'FR', 'FC',
-    'DA', 'MA', 'FA', 'ANY'
-}
-
-VALID_ATTRIBUTES = {
-    'ref', 'tck', 'cre', 'sht', 'tmw', 'one', 'mrk', 'pas', 'dri',
-    'sp', 'hnd', 'hea', 'lsh', 'psn', 'str', 'com', 'crs', 'fto',
-    'agg', 'inf', 'ecc'
-}
+@app.context_processor
+def inject_form():
+    return {'profiles': list(SCORING_PROFILES), 'form': request.form}
 
 @app.route('/')
 def index():
@@ -26,24 +27,7 @@ def index():
 
 @app.route('/consultar', methods=['POST'])
 def consultar():
-    nationality = request.form.get('nationality', '').strip().lower()
-    position = request.form.get('position', '').strip().upper()
-    age_str = request.form.get('age', '').strip()
-    age = int(age_str) if age_str.isdigit() else 0
-    active = request.form.get('active') == 'on'
-
-    player_table = "player_active" if active else "player_inactive"
-    attributes_table = "attributes_active" if active else "attributes_inactive"
-
-    # Atributos válidos apenas
-    attributes_values = {}
-    for attr in VALID_ATTRIBUTES:
-        if attr + '_min' in request.form and request.form[attr + '_min'] != '1':
-            attributes_values[attr] = True  # presença do checkbox
-        if attr + '_max' in request.form and request.form[attr + '_max'] != '50':
-            attributes_values[attr] = True  # presença do checkbox
-
-    query_data = build_query(player_table, attributes_table, nationality, age, position, attributes_values)
+    query_data = build_query(**parse_search_form(request.form))
 
     try:
         mysql_conn = mysql.connector.connect(
@@ -65,100 +49,76 @@ def consultar():
 
     return render_template('index.html', resultados=resultados)
 
-def build_query(player_table, attributes_table, nationality, age, position, attributes_values):
-    query = f"""
-    SELECT 
-        {player_table}.id,
-        {player_table}.club_id,
-        {player_table}.name,
-        {player_table}.position,
-        {player_table}.nationality,
-        {player_table}.age,
-        {player_table}.rating,
-        (
-            CASE 
-                WHEN {player_table}.position = 'GK' THEN 
-                    COALESCE({attributes_table}.Ref, 0) + COALESCE({attributes_table}.One, 0) + 
-                    COALESCE({attributes_table}.Hnd, 0) + COALESCE({attributes_table}.Com, 0) + 
-                    COALESCE({attributes_table}.Psn, 0)
-                WHEN {player_table}.position = 'DC' THEN 
-                    COALESCE({attributes_table}.Mrk, 0) + COALESCE({attributes_table}.Hea, 0) + 
-                    COALESCE({attributes_table}.Tck, 0) + COALESCE({attributes_table}.Com, 0) + 
-                    COALESCE({attributes_table}.Psn, 0)
-                WHEN {player_table}.position IN ('DL', 'DR') THEN 
-                    COALESCE({attributes_table}.Crs, 0) + COALESCE({attributes_table}.Mrk, 0) + 
-                    COALESCE({attributes_table}.Tck, 0) + COALESCE({attributes_table}.Com, 0) + 
-                    COALESCE({attributes_table}.Psn, 0)
-                WHEN {player_table}.position IN ('ML', 'MR') THEN 
-                    COALESCE({attributes_table}.Crs, 0) + COALESCE({attributes_table}.Fto, 0) + 
-                    COALESCE({attributes_table}.Pas, 0) + COALESCE({attributes_table}.Cre, 0) + 
-                    COALESCE({attributes_table}.Psn, 0)
-                WHEN {player_table}.position = 'MC' THEN 
-                    COALESCE({attributes_table}.Lsh, 0) + COALESCE({attributes_table}.Fto, 0) + 
-                    COALESCE({attributes_table}.Pas, 0) + COALESCE({attributes_table}.Cre, 0) + 
-                    COALESCE({attributes_table}.Psn, 0)
-                WHEN {player_table}.position IN ('FL', 'FR') THEN 
-                    COALESCE({attributes_table}.Sht, 0) + COALESCE({attributes_table}.Dri, 0) + 
-                    COALESCE({attributes_table}.Fto, 0) + COALESCE({attributes_table}.Crs, 0) + 
-                    COALESCE({attributes_table}.Psn, 0)
-                WHEN {player_table}.position = 'FC' THEN 
-                    COALESCE({attributes_table}.Sht, 0) + COALESCE({attributes_table}.Dri, 0) + 
-                    COALESCE({attributes_table}.Fto, 0) + COALESCE({attributes_table}.Hea, 0) + 
-                    COALESCE({attributes_table}.Psn, 0)
-                ELSE 0
-            END
-        ) AS OPS
-    FROM 
-        {player_table}
-    LEFT JOIN 
-        {attributes_table} ON {player_table}.id = {attributes_table}.id
-    """
-
-    conditions = []
-    params = []
-
-    if nationality and nationality != 'any':
-        conditions.append(f"{player_table}.nationality = %s")
-        params.append(nationality)
-
-    if position in VALID_POSITIONS and position != 'ANY':
-        if position == 'DA':
-            conditions.append(f"{player_table}.position IN (%s, %s, %s)")
-            params.extend(['DC', 'DL', 'DR'])
-        elif position == 'MA':
-            conditions.append(f"{player_table}.position IN (%s, %s, %s)")
-            params.extend(['MC', 'ML', 'MR'])
-        elif position == 'FA':
-            conditions.append(f"{player_table}.position IN (%s, %s, %s)")
-            params.extend(['FC', 'FL', 'FR'])
-        else:
-            conditions.append(f"{player_table}.position = %s")
-            params.append(position)
-
-    if age > 0:
-        conditions.append(f"{player_table}.age <= %s")
-        params.append(age)
-
-    for field in attributes_values:
-        try:
-            min_val = int(request.form.get(f"{field}_min", ""))
-            conditions.append(f"{attributes_table}.{field} >= %s")
-            params.append(min_val)
-        except ValueError:
-            pass
-        try:
-            max_val = int(request.form.get(f"{field}_max", ""))
-            conditions.append(f"{attributes_table}.{field} <= %s")
-            params.append(max_val)
-        except ValueError:
-            pass
-
-    if conditions:
-        query += " WHERE " + " AND ".join(conditions)
-
-    query += " ORDER BY OPS DESC LIMIT 1000"
-
-    return {'sql': query, 'params': params}
+@app.route('/similares', methods=['GET', 'POST'])
+def similares():
+    search = parse_similar_form(request.values)
+    if not search:
+        return render_template('index.html', error="Informe o ID do jogador.")
+
+    try:
+        resultados = player_index.similar(**search)
+    except Error as e:
+        return render_template('index.html', error=f"Erro ao acessar o banco de dados: {e}")
+
+    if resultados is None:
+        return render_template('index.html', error=f"Jogador {search['player_id']} não encontrado.")
+    if request.values.get('format') == 'json':
+        return jsonify(resultados)
+
+    return render_template('index.html', resultados=resultados, similar=True)
+
+def fetch_all(query_data):
+    mysql_conn = mysql.connector.connect(
+        host=os.environ.get("MYSQL_HOST"),
+        user=os.environ.get("MYSQL_USER"),
+        password=os.environ.get("MYSQL_PASSWORD"),
+        database=os.environ.get("MYSQL_DB")
+    )
+    try:
+        with mysql_conn.cursor(dictionary=True) as cursor:
+            cursor.execute(query_data['sql'], query_data['params'])
+            return cursor.fetchall()
+    finally:
+        mysql_conn.close()
+
+# Evolução dos atributos de um jogador, a partir da série compacta
+@app.route('/progressao/<int:player_id>')
+def progressao(player_id):
+    try:
+        rows = fetch_all(history_query(player_id))
+    except Error as e:
+        return jsonify(error=f"Erro ao acessar o banco de dados: {e}"), 500
+
+    if not rows:
+        return jsonify(error=f"Sem evolução registrada para o jogador {player_id}."), 404
+    return jsonify(decode_history(player_id, rows[0]['series']))
+
+# Jogadores que mais evoluíram no período (start, end, k, position)
+@app.route('/progressao')
+def melhores_progressoes():
+    args = parse_improvers_args(request.args)
+    try:
+        rows = fetch_all(improvers_query(**args))
+    except Error as e:
+        return jsonify(error=f"Erro ao acessar o banco de dados: {e}"), 500
+
+    return jsonify({**args, 'players': [{**row, 'gain': int(row['gain'])} for row in rows]})
+
+# Exporta jogadores e atributos com os filtros da busca (ou a base ativa/inativa inteira)
+# em csv, ndjson ou parquet, enviando o arquivo enquanto é lido do banco
+@app.route('/exportar', methods=['GET', 'POST'])
+def exportar():
+    try:
+        export_format, filters = parse_export_args(request.values)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    table = 'ativos' if filters['player_table'] == 'player_active' else 'inativos'
+    return Response(
+        iter_export(db, export_format, filters),
+        mimetype=export_format.mimetype,
+        headers={'Content-Disposition': f"attachment; filename=jogadores_{table}.{export_format.extension}"}
+    )
 
 if __name__ == '__main__':
     app.run(host='127.0.0.1', port=4000)
@@ -0,0 +1,304 @@
+import os
+import sqlite3
+import time
+
+ATTRIBUTE_COLUMNS = [
+    'Ref', 'Tck', 'Cre', 'Sht', 'Tmw', 'One', 'Mrk', 'Pas', 'Dri', 'Sp',
+    'Hnd', 'Hea', 'Lsh', 'Psn', 'Str', 'Com', 'Crs', 'Fto', 'Agg', 'Inf', 'Ecc'
+]
+
+# Cada backend sabe abrir conexões e gerar os trechos de SQL que mudam entre os bancos.
+# O Database usa só esta interface, então os mesmos métodos (upsert, move, consultas)
+# funcionam no MySQL de produção e num arquivo SQLite local.
+
+class MySQLBackend:
+    name = 'mysql'
+
+    def __init__(self):
+        self.host = os.getenv("MYSQL_HOST")
+        self.user = os.getenv("MYSQL_USER")
+        self.password = os.getenv("MYSQL_PASSWORD")
+        self.database = os.getenv("MYSQL_DB")
+
+    def connect(self):
+        # Importado aqui para o modo local funcionar sem o driver do MySQL instalado
+        import mysql.connector
+        return mysql.connector.connect(
+            host=self.host,
+            user=self.user,
+            password=self.password,
+            database=self.database
+        )
+
+    # Cursor sem buffer: as linhas vêm do servidor conforme são lidas
+    def streaming_cursor(self, connection):
+        return connection.cursor(buffered=False)
+
+    def prepare(self, query):
+        return query
+
+    # O schema do MySQL é criado e versionado pelas migrações (Migrate.py)
+    def ensure_schema(self):
+        pass
+
+    # Tabelas que o plano lê por inteiro: type ALL (tabela) ou index (índice inteiro)
+    def full_scans(self, connection, query, params=()):
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute("EXPLAIN " + query, params)
+        return [row['table'] for row in cursor.fetchall() if row['type'] in ('ALL', 'index')]
+
+    def upsert(self, table, columns, keys, source=None):
+        values = source or "VALUES (" + ", ".join(['%s'] * len(columns)) + ")"
+        updates = ",\n            ".join(f"{c} = VALUES({c})" for c in columns if c not in keys)
+        return f"""
+        INSERT INTO {table} ({', '.join(columns)})
+        {values}
+        ON DUPLICATE KEY UPDATE
+            {updates}
+        """
+
+    def insert_ignore(self, table, columns, source):
+        return f"INSERT IGNORE INTO {table} ({', '.join(columns)}) {source}"
+
+    # DELETE com JOIN de várias tabelas
+    def delete_join(self, table, alias, joins, where):
+        return f"DELETE {alias} FROM {table} {alias} {joins} WHERE {where}"
+
+    # Cria a tabela (e seus índices) descrita pelos statements
+    def create_table(self, connection, name, statements):
+        cursor = connection.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+
+    # Cria target como cópia de source (estrutura, índices e dados)
+    def copy_table(self, connection, source, target):
+        cursor = connection.cursor()
+        cursor.execute(f"DROP TABLE IF EXISTS {target}")
+        cursor.execute(f"CREATE TABLE {target} LIKE {source}")
+        cursor.execute(f"INSERT INTO {target} SELECT * FROM {source}")
+
+    # Renomeia várias tabelas de forma atômica (um único RENAME TABLE)
+    def rename_tables(self, connection, pairs):
+        renames = ", ".join(f"{old} TO {new}" for old, new in pairs)
+        connection.cursor().execute(f"RENAME TABLE {renames}")
+
+    def create_score_table(self, table):
+        return [f"""
+        CREATE TABLE IF NOT EXISTS scores_{table} (
+            id INT NOT NULL,
+            profile_id VARCHAR(32) NOT NULL,
+            score DOUBLE NOT NULL,
+            PRIMARY KEY (profile_id, id),
+            KEY idx_scores_{table}_rank (profile_id, score, id)
+        )
+        """]
+
+class SQLiteBackend:
+    name = 'sqlite'
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("SQLITE_PATH") or "opendodb.sqlite3"
+
+    def connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    # O SQLite já lê as linhas sob demanda a cada fetchmany
+    def streaming_cursor(self, connection):
+        return connection.cursor()
+
+    def prepare(self, query):
+        return query.replace('%s', '?')
+
+    def ensure_schema(self):
+        attributes = ",\n            ".join(f"{column} INTEGER" for column in ATTRIBUTE_COLUMNS)
+        statements = [
+            """
+            CREATE TABLE IF NOT EXISTS clubinfo (
+                id INTEGER PRIMARY KEY,
+                team_name TEXT, short_name TEXT, manager_id INTEGER, manager_name TEXT,
+                stadium TEXT, country TEXT, league_id INTEGER, league_name TEXT,
+                rating INTEGER, last_active TEXT, is_active INTEGER
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS attributes_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                player_id INTEGER, column_name TEXT, old_value INTEGER
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS club_active_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                club_id INTEGER, is_active INTEGER, change_date TEXT
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_club_active_history_date ON club_active_history (change_date, club_id)",
+            "CREATE INDEX IF NOT EXISTS idx_clubinfo_active ON clubinfo (is_active, id)",
+            "CREATE INDEX IF NOT EXISTS idx_clubinfo_league ON clubinfo (league_id, id)",
+            "CREATE INDEX IF NOT EXISTS idx_attributes_history_player ON attributes_history (player_id)",
+            """
+            CREATE TABLE IF NOT EXISTS progression_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                player_id INTEGER NOT NULL, crawl_date TEXT NOT NULL, attributes TEXT NOT NULL, previous TEXT
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_progression_log_player ON progression_log (player_id, id)",
+            """
+            CREATE TABLE IF NOT EXISTS player_progression (
+                player_id INTEGER PRIMARY KEY,
+                first_date TEXT NOT NULL, last_date TEXT NOT NULL, series TEXT NOT NULL
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS progression_gains (
+                player_id INTEGER NOT NULL, crawl_date TEXT NOT NULL, gain INTEGER NOT NULL,
+                PRIMARY KEY (player_id, crawl_date)
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_progression_gains_date ON progression_gains (crawl_date, player_id, gain)",
+        ]
+        tables = {
+            'clubinfo': [statements[0], statements[4], statements[5]],
+            'attributes_history': [statements[1], statements[6]],
+            'club_active_history': statements[2:4],
+        }
+        for table in ('active', 'inactive'):
+            tables[f"player_{table}"] = [
+                f"""
+                CREATE TABLE IF NOT EXISTS player_{table} (
+                    id INTEGER PRIMARY KEY,
+                    club_id INTEGER, name TEXT, position TEXT, nationality TEXT,
+                    age INTEGER, rating REAL
+                )
+                """,
+                f"CREATE INDEX IF NOT EXISTS idx_player_{table}_club ON player_{table} (club_id)",
+                f"CREATE INDEX IF NOT EXISTS idx_player_{table}_search ON player_{table} (nationality, position, age)",
+                f"CREATE INDEX IF NOT EXISTS idx_player_{table}_position ON player_{table} (position, age)",
+            ]
+            tables[f"attributes_{table}"] = [
+                f"""
+                CREATE TABLE IF NOT EXISTS attributes_{table} (
+                    id INTEGER PRIMARY KEY,
+                    {attributes}
+                )
+                """,
+            ]
+            tables[f"scores_{table}"] = self.create_score_table(table)
+
+        # Depois das tabelas de jogadores: a série de cada jogador começa com os atributos
+        # já guardados (datados de ontem), então a primeira mudança já conta como ganho
+        base = ", ".join(f"COALESCE(a.{column}, 0)" for column in ATTRIBUTE_COLUMNS)
+        tables['progression_log'] = statements[7:9]
+        tables['player_progression'] = statements[9:10] + [
+            f"""
+            INSERT OR IGNORE INTO player_progression (player_id, first_date, last_date, series)
+            SELECT a.id, date('now', '-1 day'), date('now', '-1 day'),
+                json_object('dates', json_array(date('now', '-1 day')), 'base', json_array({base}), 'deltas', json_array())
+            FROM attributes_{table} a
+            """
+            for table in ('active', 'inactive')
+        ]
+        tables['progression_gains'] = statements[10:12]
+
+        connection = self.connect()
+        try:
+            for name, table_statements in tables.items():
+                self.create_table(connection, name, table_statements)
+            connection.commit()
+        finally:
+            connection.close()
+
+    # Só cria tabela e índices se a tabela ainda não existir: depois de uma troca
+    # de shadow os índices ficam com outros nomes e não devem ser duplicados
+    def create_table(self, connection, name, statements):
+        exists = connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+        ).fetchone()
+        if not exists:
+            for statement in statements:
+                connection.execute(statement)
+
+    # Tabelas que o plano lê por inteiro: todo "SCAN", inclusive "SCAN t USING COVERING
+    # INDEX" (o índice inteiro), a não ser que seja uma faixa de rowid/chave primária
+    def full_scans(self, connection, query, params=()):
+        rows = connection.execute("EXPLAIN QUERY PLAN " + self.prepare(query), params).fetchall()
+        scans = []
+        for row in rows:
+            detail = row[-1]
+            words = detail.split()
+            if words[0] != 'SCAN' or words[1] in ('CONSTANT', '(subquery', 'SUBQUERY'):
+                continue
+            # Faixa de rowid/chave primária, ex.: "USING INTEGER PRIMARY KEY (rowid>?)"
+            if ('PRIMARY KEY' in detail or 'rowid' in detail) and '(' in detail:
+                continue
+            # Versões antigas do SQLite escrevem "SCAN TABLE tabela"
+            scans.append(words[2] if words[1] == 'TABLE' else words[1])
+        return scans
+
+    def upsert(self, table, columns, keys, source=None):
+        if source:
+            # "WHERE true" evita a ambiguidade do ON CONFLICT depois de um SELECT
+            values = f"SELECT * FROM ({source}) WHERE true"
+        else:
+            values = "VALUES (" + ", ".join(['%s'] * len(columns)) + ")"
+        updates = ",\n            ".join(f"{c} = excluded.{c}" for c in columns if c not in keys)
+        return f"""
+        INSERT INTO {table} ({', '.join(columns)})
+        {values}
+        ON CONFLICT ({', '.join(keys)}) DO UPDATE SET
+            {updates}
+        """
+
+    def insert_ignore(self, table, columns, source):
+        return f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) {source}"
+
+    # O SQLite não tem DELETE com JOIN: filtra pelos ids do SELECT equivalente
+    def delete_join(self, table, alias, joins, where):
+        return f"DELETE FROM {table} WHERE id IN (SELECT {alias}.id FROM {table} {alias} {joins} WHERE {where})"
+
+    def copy_table(self, connection, source, target):
+        connection.execute(f"DROP TABLE IF EXISTS {target}")
+        rows = connection.execute(
+            "SELECT type, sql FROM sqlite_master WHERE tbl_name = ? AND sql IS NOT NULL", (source,)
+        ).fetchall()
+        # Nomes de índice são globais no SQLite; cada cópia ganha nomes novos
+        suffix = int(time.time() * 1000)
+        indexed = set()
+        for i, (kind, sql) in enumerate(sorted(rows, key=lambda row: row[0] != 'table')):
+            if kind == 'table':
+                connection.execute(sql.replace(source, target, 1))
+            elif sql[sql.rindex('('):] not in indexed:
+                columns = sql[sql.rindex('('):]
+                indexed.add(columns)
+                connection.execute(f"CREATE INDEX idx_{target}_{suffix}_{i} ON {target} {columns}")
+        connection.execute(f"INSERT INTO {target} SELECT * FROM {source}")
+
+    # O DDL do SQLite é transacional: as renomeações entram juntas no commit
+    def rename_tables(self, connection, pairs):
+        connection.execute("BEGIN")
+        for old, new in pairs:
+            connection.execute(f"ALTER TABLE {old} RENAME TO {new}")
+
+    def create_score_table(self, table):
+        return [
+            f"""
+            CREATE TABLE IF NOT EXISTS scores_{table} (
+                id INTEGER NOT NULL,
+                profile_id TEXT NOT NULL,
+                score REAL NOT NULL,
+                PRIMARY KEY (profile_id, id)
+            )
+            """,
+            f"CREATE INDEX IF NOT EXISTS idx_scores_{table}_rank ON scores_{table} (profile_id, score, id)",
+        ]
+
+BACKENDS = {
+    'mysql': MySQLBackend,
+    'sqlite': SQLiteBackend,
+}
+
+def get_backend(name=None):
+    name = name or os.getenv("DB_BACKEND") or 'mysql'
+    if name not in BACKENDS:
+        raise ValueError(f"Backend de banco desconhecido: {name}")
+    return BACKENDS[name]()
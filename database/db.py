@@ -1,43 +1,74 @@
 import os
+import time
 from dotenv import load_dotenv
-import mysql.connector
+from database.backends import get_backend, ATTRIBUTE_COLUMNS
 
 load_dotenv()
 
+PLAYER_COLUMNS = ['id', 'club_id', 'name', 'position', 'nationality', 'age', 'rating']
+
+# Tabelas da geração ativa que podem ser reescritas numa cópia (shadow) e trocadas no fim do crawl
+SHADOW_TABLES = ['player_active', 'attributes_active', 'scores_active']
+
+CLUBINFO_COLUMNS = [
+    'id', 'team_name', 'short_name', 'manager_id', 'manager_name',
+    'stadium', 'country', 'league_id', 'league_name', 'rating',
+    'last_active', 'is_active'
+]
+
 class Database:
-    def __init__(self):
-        self.host = os.getenv("MYSQL_HOST")
-        self.user = os.getenv("MYSQL_USER")
-        self.password = os.getenv("MYSQL_PASSWORD")
-        self.database = os.getenv("MYSQL_DB")
+    # backend: 'mysql' (padrão) ou 'sqlite'; se omitido, usa DB_BACKEND
+    def __init__(self, backend=None):
+        self.backend = get_backend(backend)
         self.connection = None
+        self.backend.ensure_schema()
+
+    def new_connection(self):
+        return self.backend.connect()
 
     def connect(self):
-        self.connection = mysql.connector.connect(
-            host=self.host,
-            user=self.user,
-            password=self.password,
-            database=self.database
-        )
+        self.connection = self.new_connection()
         return self.connection.cursor()
 
     def disconnect(self):
         if self.connection:
             self.connection.close()
 
+    # Cada consulta usa sua própria conexão, então pode ser chamada de várias threads ao mesmo tempo
     def execute_query(self, query, params=None, many=False, fetch=True):
-        cursor = self.connect()
+        connection = self.new_connection()
         try:
+            cursor = connection.cursor()
+            query = self.backend.prepare(query)
             if many:
                 cursor.executemany(query, params)
             else:
-                cursor.execute(query, params)
+                cursor.execute(query, params or ())
 
             result = cursor.fetchall() if fetch else None
-            self.connection.commit()
+            connection.commit()
             return result
         finally:
-            self.disconnect()
+            connection.close()
+
+    # Lê o resultado em blocos com um cursor sem buffer (server-side), sem carregar tudo na memória
+    def iter_chunks(self, query, params=None, chunk_size=5000):
+        connection = self.new_connection()
+        cursor = self.backend.streaming_cursor(connection)
+        try:
+            cursor.execute(self.backend.prepare(query), params or ())
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            # Fechar a conexão descarta o restante do resultado se o consumidor parar antes do fim
+            connection.close()
+
+    def iter_query(self, query, params=None, chunk_size=5000):
+        for rows in self.iter_chunks(query, params, chunk_size):
+            yield from rows
 
     def log_attribute_change(self, player_id, column_name, old_value):
         query = """
@@ -46,81 +77,196 @@ class Database:
         """
         self.execute_query(query, (player_id, column_name, old_value), fetch=False)
 
+    # rows: (player_id, column_name, old_value)
+    def log_attribute_changes_batch(self, rows):
+        query = "INSERT INTO attributes_history (player_id, column_name, old_value) VALUES (%s, %s, %s)"
+        self.execute_query(query, rows, many=True, fetch=False)
+
+    # rows: (player_id, crawl_date, atributos, atributos anteriores ou None), com os 21
+    # atributos separados por vírgula
+    def log_progression_batch(self, rows):
+        query = "INSERT INTO progression_log (player_id, crawl_date, attributes, previous) VALUES (%s, %s, %s, %s)"
+        self.execute_query(query, rows, many=True, fetch=False)
+
+    def update_progression_batch(self, progression_data, gains_data):
+        query = self.backend.upsert("player_progression", ['player_id', 'first_date', 'last_date', 'series'], ['player_id'])
+        self.execute_query(query, progression_data, many=True, fetch=False)
+        if gains_data:
+            query = self.backend.upsert("progression_gains", ['player_id', 'crawl_date', 'gain'], ['player_id', 'crawl_date'])
+            self.execute_query(query, gains_data, many=True, fetch=False)
+
     def update_players_batch(self, table, players_data):
         converted = [
             (int(p[0]), int(p[1]), str(p[2]), str(p[3]), str(p[4]), int(p[5]), float(p[6]))
             for p in players_data
         ]
-        query = f"""
-        INSERT INTO player_{table} (
-            id, club_id, name, position, nationality, age, rating
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s)
-        ON DUPLICATE KEY UPDATE
-            club_id = VALUES(club_id),
-            name = VALUES(name),
-            position = VALUES(position),
-            nationality = VALUES(nationality),
-            age = VALUES(age),
-            rating = VALUES(rating);
-        """
+        query = self.backend.upsert(f"player_{table}", PLAYER_COLUMNS, ['id'])
         self.execute_query(query, converted, many=True, fetch=False)
 
     def update_attributes_batch(self, table, data):
         converted = [tuple(row) for row in data]
-        query = f"""
-        INSERT INTO attributes_{table} (
-            id, Ref, Tck, Cre, Sht, Tmw, One, Mrk, Pas, Dri, Sp, Hnd, Hea, Lsh, Psn, Str, Com, Crs, Fto, Agg, Inf, Ecc
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        ON DUPLICATE KEY UPDATE
-            Ref = VALUES(Ref), Tck = VALUES(Tck), Cre = VALUES(Cre), Sht = VALUES(Sht),
-            Tmw = VALUES(Tmw), One = VALUES(One), Mrk = VALUES(Mrk), Pas = VALUES(Pas),
-            Dri = VALUES(Dri), Sp = VALUES(Sp), Hnd = VALUES(Hnd), Hea = VALUES(Hea),
-            Lsh = VALUES(Lsh), Psn = VALUES(Psn), Str = VALUES(Str), Com = VALUES(Com),
-            Crs = VALUES(Crs), Fto = VALUES(Fto), Agg = VALUES(Agg), Inf = VALUES(Inf), Ecc = VALUES(Ecc);
-        """
+        query = self.backend.upsert(f"attributes_{table}", ['id'] + ATTRIBUTE_COLUMNS, ['id'])
         self.execute_query(query, converted, many=True, fetch=False)
 
     def get_clubinfo(self, clubs=None):
+        return list(self.iter_clubinfo(clubs))
+
+    def iter_clubinfo(self, clubs=None, chunk_size=5000):
         if clubs:
             placeholders = ','.join(['%s'] * len(clubs))
             query = f"SELECT id FROM clubinfo WHERE id IN ({placeholders}) AND is_active = 1"
-            return [row[0] for row in self.execute_query(query, clubs)]
+            rows = self.iter_query(query, clubs, chunk_size)
         else:
             query = "SELECT id FROM clubinfo WHERE is_active = 1"
-            return [row[0] for row in self.execute_query(query)]
+            rows = self.iter_query(query, chunk_size=chunk_size)
+        for row in rows:
+            yield row[0]
 
     def get_clubinfo_with_is_inactive(self, start, end):
         query = "SELECT id, is_active FROM clubinfo WHERE is_active = 0 AND id >= %s AND id <= %s"
         result = self.execute_query(query, (start, end))
         return {row[0]: row[1] for row in result}
 
+    def get_league_ids(self):
+        query = "SELECT DISTINCT league_id FROM clubinfo WHERE league_id > 0"
+        return [row[0] for row in self.iter_query(query)]
+
+    # Dados de liga guardados de cada clube: {id: (team_name, league_id, last_active, is_active)}
+    def get_league_clubinfo(self, chunk_size=5000):
+        query = "SELECT id, team_name, league_id, last_active, is_active FROM clubinfo"
+        return {row[0]: row[1:] for row in self.iter_query(query, chunk_size=chunk_size)}
+
     def update_club_info(self, data):
         converted = [tuple(row) for row in data]
-        query = """
-        INSERT INTO clubinfo (
-            id, team_name, short_name, manager_id, manager_name,
-            stadium, country, league_id, league_name, rating,
-            last_active, is_active
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        ON DUPLICATE KEY UPDATE
-            team_name = VALUES(team_name),
-            short_name = VALUES(short_name),
-            manager_id = VALUES(manager_id),
-            manager_name = VALUES(manager_name),
-            stadium = VALUES(stadium),
-            country = VALUES(country),
-            league_id = VALUES(league_id),
-            league_name = VALUES(league_name),
-            rating = VALUES(rating),
-            last_active = VALUES(last_active),
-            is_active = VALUES(is_active);
-        """
+        query = self.backend.upsert("clubinfo", CLUBINFO_COLUMNS, ['id'])
         self.execute_query(query, converted, many=True, fetch=False)
 
     def get_all_players_and_attributes(self):
+        return dict(self.iter_players_and_attributes())
+
+    def iter_players_and_attributes(self, chunk_size=5000):
         query = "SELECT id, Ref, Tck, Cre, Sht, Tmw, One, Mrk, Pas, Dri, Sp, Hnd, Hea, Lsh, Psn, Str, Com, Crs, Fto, Agg, Inf, Ecc FROM attributes_active"
-        result = self.execute_query(query)
-        return {row[0]: row[1:] for row in result}
+        for row in self.iter_query(query, chunk_size=chunk_size):
+            yield row[0], row[1:]
+
+    # Carrega sob demanda só a parte do snapshot de um clube (linha do jogador + atributos)
+    def get_players_and_attributes_by_club(self, club_id, table='active'):
+        query = self.snapshot_query("p.club_id = %s", table)
+        return {row[0]: row[1:] for row in self.execute_query(query, (club_id,))}
+
+    def get_players_and_attributes_by_ids(self, player_ids, table='active'):
+        if not player_ids:
+            return {}
+        placeholders = ','.join(['%s'] * len(player_ids))
+        query = self.snapshot_query(f"p.id IN ({placeholders})", table)
+        return {row[0]: row[1:] for row in self.execute_query(query, list(player_ids))}
+
+    def snapshot_query(self, condition, table='active'):
+        columns = ', '.join(f"a.{column}" for column in ATTRIBUTE_COLUMNS)
+        return f"""
+        SELECT p.id, p.club_id, p.name, p.position, p.nationality, p.age, p.rating, {columns}
+        FROM player_{table} p
+        LEFT JOIN attributes_{table} a ON a.id = p.id
+        WHERE {condition}
+        """
+
+    # Lê todos os jogadores de uma tabela (active/inactive) junto com os atributos, em blocos
+    def iter_players_with_attributes(self, table, chunk_size=5000):
+        columns = ', '.join(f"a.{column}" for column in ATTRIBUTE_COLUMNS)
+        query = f"""
+        SELECT p.id, p.club_id, p.name, p.position, p.nationality, p.age, p.rating, {columns}
+        FROM player_{table} p
+        JOIN attributes_{table} a ON a.id = p.id
+        """
+        return self.iter_chunks(query, chunk_size=chunk_size)
+
+    def create_score_table(self, table):
+        connection = self.new_connection()
+        try:
+            self.backend.create_table(connection, f"scores_{table}", self.backend.create_score_table(table))
+            connection.commit()
+        finally:
+            connection.close()
+
+    # Recalcula a pontuação guardada de um perfil; com player_ids, só desses jogadores
+    def refresh_scores(self, table, profile_id, expression, player_ids=None):
+        params = [profile_id]
+        condition = ""
+        if player_ids:
+            condition = f"WHERE p.id IN ({','.join(['%s'] * len(player_ids))})"
+            params.extend(player_ids)
+
+        source = f"""
+            SELECT p.id, %s, {expression}
+            FROM player_{table} p
+            JOIN attributes_{table} a ON a.id = p.id
+            {condition}
+        """
+        query = self.backend.upsert(f"scores_{table}", ['id', 'profile_id', 'score'], ['profile_id', 'id'], source)
+        self.execute_query(query, params, fetch=False)
+
+        # Na atualização completa, remove as pontuações de jogadores que saíram da tabela
+        if not player_ids:
+            query = self.backend.delete_join(
+                f"scores_{table}", "s",
+                f"LEFT JOIN player_{table} p ON p.id = s.id",
+                "s.profile_id = %s AND p.id IS NULL"
+            )
+            self.execute_query(query, (profile_id,), fetch=False)
+
+    def delete_scores(self, table, player_ids):
+        if not player_ids:
+            return
+        placeholders = ','.join(['%s'] * len(player_ids))
+        self.execute_query(f"DELETE FROM scores_{table} WHERE id IN ({placeholders})", list(player_ids), fetch=False)
+
+    # Copia as tabelas ativas para *_shadow; o crawl escreve nelas enquanto as buscas leem as originais
+    def prepare_shadow(self):
+        self.create_score_table('active')
+        connection = self.new_connection()
+        try:
+            for table in SHADOW_TABLES:
+                self.backend.copy_table(connection, table, f"{table}_shadow")
+            connection.commit()
+        finally:
+            connection.close()
+
+    # Promove as cópias numa troca atômica; a geração anterior fica em *_prev para rollback
+    def promote_shadow(self):
+        connection = self.new_connection()
+        try:
+            cursor = connection.cursor()
+            for table in SHADOW_TABLES:
+                cursor.execute(f"DROP TABLE IF EXISTS {table}_prev")
+            connection.commit()
+
+            pairs = []
+            for table in SHADOW_TABLES:
+                pairs += [(table, f"{table}_prev"), (f"{table}_shadow", table)]
+            self.backend.rename_tables(connection, pairs)
+            connection.commit()
+        finally:
+            connection.close()
+        print("Geração nova das tabelas ativas promovida.")
+
+    # Volta para a geração anterior (e guarda a atual em *_prev, então pode ser desfeito)
+    def rollback_shadow(self):
+        connection = self.new_connection()
+        try:
+            pairs = []
+            for table in SHADOW_TABLES:
+                pairs += [(table, f"{table}_swap"), (f"{table}_prev", table), (f"{table}_swap", f"{table}_prev")]
+            self.backend.rename_tables(connection, pairs)
+            connection.commit()
+        finally:
+            connection.close()
+        print("Geração anterior das tabelas ativas restaurada.")
+
+    # Marca que os dados de jogadores mudaram, para os índices em memória serem recarregados
+    def mark_players_changed(self):
+        stamp_file = os.getenv("INDEX_STAMP_FILE") or ".players_changed"
+        with open(stamp_file, "w") as f:
+            f.write(str(time.time()))
 
     def log_clubinfo_change(self, club_id, is_active, change_date):
         query = """
@@ -137,46 +283,56 @@ class Database:
         query = "SELECT id, club_id, name, position, nationality, age, rating FROM player_active WHERE club_id = %s"
         return self.execute_query(query, (club_id,))
 
-    def move_player(self):
+    # active: tabela de origem ('active', ou 'active_shadow' no modo shadow)
+    # club_ids: move só os jogadores desses clubes (usado pelo CrawlOrchestrator)
+    def move_player(self, active='active', club_ids=None):
+        where = "c.is_active = 0"
+        params = ()
+        if club_ids:
+            where += f" AND c.id IN ({','.join(['%s'] * len(club_ids))})"
+            params = tuple(club_ids)
+
+        # Jogadores que vão ser movidos, para atualizar só as pontuações deles
+        moved_ids = [row[0] for row in self.execute_query(f"""
+            SELECT p.id
+            FROM player_{active} p
+            JOIN clubinfo c ON p.club_id = c.id
+            WHERE {where}
+        """, params)]
+
         # Step 1: Inserir jogadores inativos
-        self.execute_query("""
-            INSERT IGNORE INTO player_inactive (id, club_id, name, position, nationality, age, rating)
-            SELECT p.id, p.club_id, p.name, p.position, p.nationality, p.age, p.rating
-            FROM player_active p
+        self.execute_query(self.backend.insert_ignore("player_inactive", PLAYER_COLUMNS, f"""
+            SELECT {', '.join(f"p.{c}" for c in PLAYER_COLUMNS)}
+            FROM player_{active} p
             JOIN clubinfo c ON p.club_id = c.id
-            WHERE c.is_active = 0
-        """, fetch=False)
+            WHERE {where}
+        """), params, fetch=False)
 
         # Step 2: Inserir atributos inativos
-        self.execute_query("""
-            INSERT IGNORE INTO attributes_inactive (id, Ref, Tck, Cre, Sht, Tmw, One, Mrk, Pas, Dri, Sp,
-                                                    Hnd, Hea, Lsh, Psn, Str, Com, Crs, Fto, Agg, Inf, Ecc)
-            SELECT a.id, a.Ref, a.Tck, a.Cre, a.Sht, a.Tmw, a.One, a.Mrk, a.Pas, a.Dri, a.Sp,
-                a.Hnd, a.Hea, a.Lsh, a.Psn, a.Str, a.Com, a.Crs, a.Fto, a.Agg, a.Inf, a.Ecc
-            FROM attributes_active a
-            JOIN player_active p ON a.id = p.id
+        self.execute_query(self.backend.insert_ignore("attributes_inactive", ['id'] + ATTRIBUTE_COLUMNS, f"""
+            SELECT {', '.join(f"a.{c}" for c in ['id'] + ATTRIBUTE_COLUMNS)}
+            FROM attributes_{active} a
+            JOIN player_{active} p ON a.id = p.id
             JOIN clubinfo c ON p.club_id = c.id
-            WHERE c.is_active = 0
-        """, fetch=False)
+            WHERE {where}
+        """), params, fetch=False)
 
         # Step 3: Deletar atributos ativos dos jogadores inativos
-        self.execute_query("""
-            DELETE a
-            FROM attributes_active a
-            JOIN player_active p ON a.id = p.id
-            JOIN clubinfo c ON p.club_id = c.id
-            WHERE c.is_active = 0
-        """, fetch=False)
+        self.execute_query(self.backend.delete_join(
+            f"attributes_{active}", "a",
+            f"JOIN player_{active} p ON a.id = p.id JOIN clubinfo c ON p.club_id = c.id",
+            where
+        ), params, fetch=False)
 
         # Step 4: Deletar jogadores ativos de clubes inativos
-        self.execute_query("""
-            DELETE p
-            FROM player_active p
-            JOIN clubinfo c ON p.club_id = c.id
-            WHERE c.is_active = 0
-        """, fetch=False)
+        self.execute_query(self.backend.delete_join(
+            f"player_{active}", "p",
+            "JOIN clubinfo c ON p.club_id = c.id",
+            where
+        ), params, fetch=False)
 
-        print("Transferência de jogadores inativos concluída.")
+        print(f"Transferência de jogadores inativos concluída. {len(moved_ids)} jogadores movidos.")
+        return moved_ids
 
     def get_max_club_id(self):
         query = "SELECT MAX(id) FROM clubinfo"
@@ -0,0 +1,143 @@
+import csv
+import io
+import json
+from database.db import PLAYER_COLUMNS, ATTRIBUTE_COLUMNS
+from database.search import parse_search_form, build_conditions
+
+EXPORT_COLUMNS = PLAYER_COLUMNS + ATTRIBUTE_COLUMNS
+
+# Linhas por página (uma conexão curta por página) e por bloco enviado ao cliente
+EXPORT_PAGE_SIZE = 20000
+EXPORT_CHUNK_SIZE = 1000
+
+class CSVFormat:
+    mimetype = 'text/csv'
+    extension = 'csv'
+
+    def start(self):
+        return self.encode([EXPORT_COLUMNS])
+
+    def encode(self, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode()
+
+    def finish(self):
+        return b''
+
+class NDJSONFormat:
+    mimetype = 'application/x-ndjson'
+    extension = 'ndjson'
+
+    def start(self):
+        return b''
+
+    def encode(self, rows):
+        return "".join(json.dumps(dict(zip(EXPORT_COLUMNS, row))) + "\n" for row in rows).encode()
+
+    def finish(self):
+        return b''
+
+# Buffer de escrita que devolve e descarta o que já foi escrito
+class _Drain(io.RawIOBase):
+    def __init__(self):
+        self.parts = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data, self.parts = b''.join(self.parts), []
+        return data
+
+# Parquet (colunar), um row group por bloco; precisa do pyarrow instalado
+class ParquetFormat:
+    mimetype = 'application/vnd.apache.parquet'
+    extension = 'parquet'
+
+    def __init__(self):
+        # Importado aqui para os outros formatos funcionarem sem o pyarrow
+        import pyarrow
+        import pyarrow.parquet
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        types = {'name': pyarrow.string(), 'position': pyarrow.string(), 'nationality': pyarrow.string(), 'rating': pyarrow.float64()}
+        self.schema = pyarrow.schema([(column, types.get(column, pyarrow.int64())) for column in EXPORT_COLUMNS])
+        self.sink = _Drain()
+        self.writer = None
+
+    def start(self):
+        self.writer = self.pq.ParquetWriter(self.sink, self.schema)
+        return self.sink.drain()
+
+    def encode(self, rows):
+        columns = list(zip(*rows))
+        self.writer.write_table(self.pa.Table.from_arrays(
+            [self.pa.array(values, type=field.type) for values, field in zip(columns, self.schema)],
+            schema=self.schema
+        ))
+        return self.sink.drain()
+
+    def finish(self):
+        self.writer.close()
+        return self.sink.drain()
+
+EXPORT_FORMATS = {
+    'csv': CSVFormat,
+    'ndjson': NDJSONFormat,
+    'parquet': ParquetFormat,
+}
+
+# Lê o formato e os filtros (os mesmos da busca); ValueError se o formato não estiver disponível
+def parse_export_args(values):
+    name = values.get('format', 'csv').strip().lower()
+    if name not in EXPORT_FORMATS:
+        raise ValueError(f"Formato de exportação inválido: {name}")
+    try:
+        export_format = EXPORT_FORMATS[name]()
+    except ImportError:
+        raise ValueError(f"Formato {name} indisponível: pyarrow não está instalado")
+
+    filters = parse_search_form(values)
+    filters.pop('profile_id')
+    return export_format, filters
+
+# Uma página da exportação: jogadores com id maior que after_id, em ordem de id
+def export_query(player_table, attributes_table, nationality, age, position, attributes_values, form, after_id=0, limit=EXPORT_PAGE_SIZE):
+    columns = [f"{player_table}.{column}" for column in PLAYER_COLUMNS]
+    columns += [f"{attributes_table}.{column}" for column in ATTRIBUTE_COLUMNS]
+    conditions, params = build_conditions(player_table, attributes_table, nationality, age, position, attributes_values, form)
+    conditions.append(f"{player_table}.id > %s")
+    params.append(after_id)
+    params.append(limit)
+
+    query = f"""
+    SELECT {', '.join(columns)}
+    FROM {player_table}
+    LEFT JOIN {attributes_table} ON {player_table}.id = {attributes_table}.id
+    WHERE {' AND '.join(conditions)}
+    ORDER BY {player_table}.id
+    LIMIT %s
+    """
+    return {'sql': query, 'params': params}
+
+# Gera o arquivo em pedaços. Cada página é lida com um cursor sem buffer numa conexão
+# própria, fechada no fim da página: a memória fica constante e nenhuma conexão fica
+# presa durante todo o download
+def iter_export(db, export_format, filters, page_size=EXPORT_PAGE_SIZE, chunk_size=EXPORT_CHUNK_SIZE):
+    yield export_format.start()
+    after_id = 0
+    while True:
+        query = export_query(**filters, after_id=after_id, limit=page_size)
+        count = 0
+        for rows in db.iter_chunks(query['sql'], query['params'], chunk_size):
+            count += len(rows)
+            after_id = rows[-1][0]
+            yield export_format.encode(rows)
+        if count < page_size:
+            break
+    yield export_format.finish()
@@ -0,0 +1,120 @@
+import os
+import re
+from database.search import build_query
+from database.progression import improvers_query
+from database.scoring import SCORING_PROFILES, refresh_scores
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), 'migrations')
+
+MIGRATION_FILE = re.compile(r'(\d+)_\w+\.sql')
+
+# Erro do MySQL para índice que já existe (criado à mão antes das migrações)
+DUPLICATE_KEY_NAME = 1061
+
+# Lista as migrações como [(versão, caminho)], em ordem
+def load_migrations(path=MIGRATIONS_DIR):
+    migrations = []
+    for name in os.listdir(path):
+        match = MIGRATION_FILE.fullmatch(name)
+        if match:
+            migrations.append((int(match.group(1)), os.path.join(path, name)))
+    return sorted(migrations)
+
+# Separa o arquivo em comandos (um por ";" no fim da linha), sem os comentários
+def split_statements(sql):
+    lines = [line for line in sql.splitlines() if not line.strip().startswith('--')]
+    return [statement.strip() for statement in re.split(r';\s*$', "\n".join(lines), flags=re.M) if statement.strip()]
+
+def applied_versions(db):
+    db.execute_query("""
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INT NOT NULL PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+    """, fetch=False)
+    return {row[0] for row in db.execute_query("SELECT version FROM schema_migrations")}
+
+# Aplica as migrações pendentes; cada uma é registrada em schema_migrations ao terminar.
+# O DDL do MySQL faz commit implícito, então uma migração que falhar no meio deve ser
+# escrita de forma que possa rodar de novo (IF NOT EXISTS, um índice por ALTER).
+def migrate(db):
+    if db.backend.name != 'mysql':
+        print(f"O backend {db.backend.name} cria o próprio schema; nenhuma migração a aplicar.")
+        backfill_scores(db)
+        return []
+
+    applied = applied_versions(db)
+    pending = [(version, path) for version, path in load_migrations() if version not in applied]
+    for version, path in pending:
+        with open(path) as f:
+            statements = split_statements(f.read())
+        for statement in statements:
+            try:
+                db.execute_query(statement, fetch=False)
+            except Exception as e:
+                if getattr(e, 'errno', None) != DUPLICATE_KEY_NAME:
+                    raise
+                print(f"Índice já existe, pulando: {statement.splitlines()[0]}")
+        db.execute_query(
+            "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+            (version, os.path.basename(path)), fetch=False
+        )
+        print(f"Migração {os.path.basename(path)} aplicada.")
+    backfill_scores(db)
+    return pending
+
+# A busca parte das tabelas de pontuação: calcula as pontuações dos perfis que ainda
+# não têm nenhuma linha (banco de antes das tabelas scores_* ou perfil novo), senão os
+# jogadores somem da busca até alguém rodar o ScoreRefresher.py
+def backfill_scores(db):
+    filled = []
+    for table in ('active', 'inactive'):
+        db.create_score_table(table)
+        stored = {row[0] for row in db.execute_query(f"SELECT DISTINCT profile_id FROM scores_{table}")}
+        missing = [profile_id for profile_id in SCORING_PROFILES if profile_id not in stored]
+        if not missing or not db.execute_query(f"SELECT 1 FROM player_{table} LIMIT 1"):
+            continue
+        refresh_scores(db, table)
+        filled.append(table)
+        print(f"Pontuações de {table} calculadas para os perfis: {', '.join(missing)}.")
+    return filled
+
+# Formatos de consulta conhecidos, com parâmetros de exemplo, que devem usar índice
+def known_queries(db):
+    queries = {}
+    for table in ('active', 'inactive'):
+        for name, form in (
+            ('busca por nacionalidade', {'nationality': 'brazil', 'position': 'MC', 'age': 23}),
+            ('busca por posição', {'nationality': 'any', 'position': 'DC', 'age': 30, 'mrk_min': '30'}),
+            ('busca só por pontuação', {}),
+        ):
+            query = build_query(
+                f"player_{table}", f"attributes_{table}",
+                form.get('nationality', ''), form.get('age', 0), form.get('position', ''),
+                {field[:-4]: True for field in form if field.endswith('_min')}, form
+            )
+            queries[f"{name} ({table})"] = (query['sql'], query['params'])
+        queries[f"snapshot por clube ({table})"] = (db.snapshot_query("p.club_id = %s", table), (1,))
+    queries["get_player_active"] = ("SELECT id, club_id, name, position, nationality, age, rating FROM player_active WHERE club_id = %s", (1,))
+    queries["get_club_active_history"] = ("SELECT club_id FROM club_active_history WHERE change_date = %s", ('2025-01-01',))
+    queries["get_clubinfo"] = ("SELECT id FROM clubinfo WHERE is_active = 1", ())
+    queries["clubes de uma liga"] = ("SELECT id FROM clubinfo WHERE league_id = %s", (1,))
+    improvers = improvers_query('2025-01-01', '2025-01-31', 20)
+    queries["ranking de evolução"] = (improvers['sql'], improvers['params'])
+    return queries
+
+# Roda EXPLAIN em cada consulta conhecida; retorna {consulta: [tabelas lidas por inteiro]}.
+# Com tabelas vazias ou muito pequenas o otimizador pode preferir a leitura completa,
+# então a verificação só é significativa num banco com dados.
+def check_indexes(db):
+    failures = {}
+    connection = db.new_connection()
+    try:
+        for name, (query, params) in known_queries(db).items():
+            scans = db.backend.full_scans(connection, query, tuple(params))
+            if scans:
+                failures[name] = scans
+    finally:
+        connection.close()
+    return failures
@@ -0,0 +1,123 @@
+-- Schema completo do banco (MySQL). IF NOT EXISTS: pode ser aplicado sobre um banco criado à mão
+
+CREATE TABLE IF NOT EXISTS clubinfo (
+    id INT NOT NULL,
+    team_name VARCHAR(128),
+    short_name VARCHAR(64),
+    manager_id INT,
+    manager_name VARCHAR(128),
+    stadium VARCHAR(128),
+    country VARCHAR(64),
+    league_id INT,
+    league_name VARCHAR(128),
+    rating INT,
+    last_active DATE,
+    is_active TINYINT,
+    PRIMARY KEY (id)
+);
+
+CREATE TABLE IF NOT EXISTS player_active (
+    id INT NOT NULL,
+    club_id INT,
+    name VARCHAR(128),
+    position VARCHAR(4),
+    nationality VARCHAR(64),
+    age INT,
+    rating DOUBLE,
+    PRIMARY KEY (id)
+);
+
+CREATE TABLE IF NOT EXISTS attributes_active (
+    id INT NOT NULL,
+    Ref INT,
+    Tck INT,
+    Cre INT,
+    Sht INT,
+    Tmw INT,
+    One INT,
+    Mrk INT,
+    Pas INT,
+    Dri INT,
+    Sp INT,
+    Hnd INT,
+    Hea INT,
+    Lsh INT,
+    Psn INT,
+    Str INT,
+    Com INT,
+    Crs INT,
+    Fto INT,
+    Agg INT,
+    Inf INT,
+    Ecc INT,
+    PRIMARY KEY (id)
+);
+
+CREATE TABLE IF NOT EXISTS scores_active (
+    id INT NOT NULL,
+    profile_id VARCHAR(32) NOT NULL,
+    score DOUBLE NOT NULL,
+    PRIMARY KEY (profile_id, id),
+    KEY idx_scores_active_rank (profile_id, score, id)
+);
+
+CREATE TABLE IF NOT EXISTS player_inactive (
+    id INT NOT NULL,
+    club_id INT,
+    name VARCHAR(128),
+    position VARCHAR(4),
+    nationality VARCHAR(64),
+    age INT,
+    rating DOUBLE,
+    PRIMARY KEY (id)
+);
+
+CREATE TABLE IF NOT EXISTS attributes_inactive (
+    id INT NOT NULL,
+    Ref INT,
+    Tck INT,
+    Cre INT,
+    Sht INT,
+    Tmw INT,
+    One INT,
+    Mrk INT,
+    Pas INT,
+    Dri INT,
+    Sp INT,
+    Hnd INT,
+    Hea INT,
+    Lsh INT,
+    Psn INT,
+    Str INT,
+    Com INT,
+    Crs INT,
+    Fto INT,
+    Agg INT,
+    Inf INT,
+    Ecc INT,
+    PRIMARY KEY (id)
+);
+
+CREATE TABLE IF NOT EXISTS scores_inactive (
+    id INT NOT NULL,
+    profile_id VARCHAR(32) NOT NULL,
+    score DOUBLE NOT NULL,
+    PRIMARY KEY (profile_id, id),
+    KEY idx_scores_inactive_rank (profile_id, score, id)
+);
+
+CREATE TABLE IF NOT EXISTS attributes_history (
+    id INT NOT NULL AUTO_INCREMENT,
+    player_id INT,
+    column_name VARCHAR(8),
+    old_value INT,
+    PRIMARY KEY (id)
+);
+
+CREATE TABLE IF NOT EXISTS club_active_history (
+    id INT NOT NULL AUTO_INCREMENT,
+    club_id INT,
+    is_active TINYINT,
+    change_date DATE,
+    PRIMARY KEY (id)
+);
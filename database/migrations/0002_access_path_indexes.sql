@@ -0,0 +1,25 @@
+-- Índices dos caminhos de acesso usados pela aplicação e pelos scrapers.
+-- São índices de filtro, não de cobertura: a busca ainda lê name, club_id e rating
+-- da linha (pela chave primária) e, desde as tabelas scores_*, costuma partir do
+-- índice idx_scores_*_rank (profile_id, score, id), com player_* entrando pelo id.
+-- Os índices de busca abaixo só são escolhidos quando o filtro é seletivo (ex.:
+-- uma nacionalidade rara); confira com python3 Migrate.py --check antes de ajustar.
+
+-- Busca (build_query): nacionalidade, posição e idade máxima
+ALTER TABLE player_active ADD KEY idx_player_active_search (nationality, position, age);
+ALTER TABLE player_active ADD KEY idx_player_active_position (position, age);
+ALTER TABLE player_inactive ADD KEY idx_player_inactive_search (nationality, position, age);
+ALTER TABLE player_inactive ADD KEY idx_player_inactive_position (position, age);
+
+-- get_player_active, snapshot por clube e move_player
+ALTER TABLE player_active ADD KEY idx_player_active_club (club_id);
+ALTER TABLE player_inactive ADD KEY idx_player_inactive_club (club_id);
+
+-- get_clubinfo (clubes ativos) e LeagueScraper
+ALTER TABLE clubinfo ADD KEY idx_clubinfo_active (is_active, id);
+ALTER TABLE clubinfo ADD KEY idx_clubinfo_league (league_id, id);
+
+-- get_club_active_history
+ALTER TABLE club_active_history ADD KEY idx_club_active_history_date (change_date, club_id);
+
+ALTER TABLE attributes_history ADD KEY idx_attributes_history_player (player_id);
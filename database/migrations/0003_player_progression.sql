@@ -0,0 +1,65 @@
+-- Evolução dos atributos (database/progression.py)
+
+-- Snapshots de cada crawl, até a compactação; previous guarda os atributos anteriores à mudança
+CREATE TABLE IF NOT EXISTS progression_log (
+    id BIGINT NOT NULL AUTO_INCREMENT,
+    player_id INT NOT NULL,
+    crawl_date DATE NOT NULL,
+    attributes VARCHAR(128) NOT NULL,
+    previous VARCHAR(128) NULL,
+    PRIMARY KEY (id),
+    KEY idx_progression_log_player (player_id, id)
+);
+
+-- Série compacta por jogador (base + deltas, em JSON)
+CREATE TABLE IF NOT EXISTS player_progression (
+    player_id INT NOT NULL,
+    first_date DATE NOT NULL,
+    last_date DATE NOT NULL,
+    series MEDIUMTEXT NOT NULL,
+    PRIMARY KEY (player_id)
+);
+
+-- Ganho de cada passo da série; o índice por data cobre o ranking de evolução
+CREATE TABLE IF NOT EXISTS progression_gains (
+    player_id INT NOT NULL,
+    crawl_date DATE NOT NULL,
+    gain INT NOT NULL,
+    PRIMARY KEY (player_id, crawl_date),
+    KEY idx_progression_gains_date (crawl_date, player_id, gain)
+);
+
+-- Cada jogador já guardado começa a série com os atributos atuais, datados de ontem:
+-- a primeira mudança num crawl já gera um ganho, e jogadores sem mudança têm histórico
+
+INSERT IGNORE INTO player_progression (player_id, first_date, last_date, series)
+SELECT a.id, CURDATE() - INTERVAL 1 DAY, CURDATE() - INTERVAL 1 DAY,
+    JSON_OBJECT(
+        'dates', JSON_ARRAY(CAST(CURDATE() - INTERVAL 1 DAY AS CHAR)),
+        'base', JSON_ARRAY(
+        COALESCE(a.Ref, 0), COALESCE(a.Tck, 0), COALESCE(a.Cre, 0), COALESCE(a.Sht, 0),
+        COALESCE(a.Tmw, 0), COALESCE(a.One, 0), COALESCE(a.Mrk, 0), COALESCE(a.Pas, 0),
+        COALESCE(a.Dri, 0), COALESCE(a.Sp, 0), COALESCE(a.Hnd, 0), COALESCE(a.Hea, 0),
+        COALESCE(a.Lsh, 0), COALESCE(a.Psn, 0), COALESCE(a.Str, 0), COALESCE(a.Com, 0),
+        COALESCE(a.Crs, 0), COALESCE(a.Fto, 0), COALESCE(a.Agg, 0), COALESCE(a.Inf, 0),
+        COALESCE(a.Ecc, 0)
+        ),
+        'deltas', JSON_ARRAY()
+    )
+FROM attributes_active a;
+
+INSERT IGNORE INTO player_progression (player_id, first_date, last_date, series)
+SELECT a.id, CURDATE() - INTERVAL 1 DAY, CURDATE() - INTERVAL 1 DAY,
+    JSON_OBJECT(
+        'dates', JSON_ARRAY(CAST(CURDATE() - INTERVAL 1 DAY AS CHAR)),
+        'base', JSON_ARRAY(
+        COALESCE(a.Ref, 0), COALESCE(a.Tck, 0), COALESCE(a.Cre, 0), COALESCE(a.Sht, 0),
+        COALESCE(a.Tmw, 0), COALESCE(a.One, 0), COALESCE(a.Mrk, 0), COALESCE(a.Pas, 0),
+        COALESCE(a.Dri, 0), COALESCE(a.Sp, 0), COALESCE(a.Hnd, 0), COALESCE(a.Hea, 0),
+        COALESCE(a.Lsh, 0), COALESCE(a.Psn, 0), COALESCE(a.Str, 0), COALESCE(a.Com, 0),
+        COALESCE(a.Crs, 0), COALESCE(a.Fto, 0), COALESCE(a.Agg, 0), COALESCE(a.Inf, 0),
+        COALESCE(a.Ecc, 0)
+        ),
+        'deltas', JSON_ARRAY()
+    )
+FROM attributes_inactive a;
@@ -0,0 +1,147 @@
+import os
+import threading
+import numpy as np
+from database.db import Database, ATTRIBUTE_COLUMNS  # Importa a classe Database
+from database.scoring import POSITION_ATTRIBUTES, DEFAULT_PROFILE, weight_matrix
+
+POSITION_GROUPS = {
+    'DA': ('DC', 'DL', 'DR'),
+    'MA': ('MC', 'ML', 'MR'),
+    'FA': ('FC', 'FL', 'FR'),
+}
+
+# Peso dos atributos principais da posição do jogador de referência na distância
+KEY_ATTRIBUTE_WEIGHT = 3.0
+
+# Arrays de uma carga do índice; uma carga nova substitui a anterior de uma vez
+class IndexData:
+    def __init__(self, ids, vectors, positions, ages, active, info):
+        self.ids = np.array(ids, dtype=np.int64)
+        self.vectors = np.array(vectors, dtype=np.float32).reshape(-1, len(ATTRIBUTE_COLUMNS))
+        self.positions = np.array(positions, dtype=object)
+        # Código numérico da posição; posições desconhecidas ficam com o último código (peso zero)
+        codes = {position: i for i, position in enumerate(POSITION_ATTRIBUTES)}
+        self.position_codes = np.array([codes.get(p, len(codes)) for p in positions], dtype=np.int32)
+        self.ages = np.array(ages, dtype=np.int32)
+        self.active = np.array(active, dtype=bool)
+        self.info = info
+        # Se o jogador estiver nas duas tabelas, vale a linha ativa (carregada primeiro)
+        self.row_of = {}
+        for row, player_id in enumerate(ids):
+            self.row_of.setdefault(player_id, row)
+
+# Índice em memória dos vetores de atributos dos jogadores ativos e inativos.
+# A busca é força bruta vetorizada com numpy, e o índice é recarregado
+# sempre que um crawl termina (ver Database.mark_players_changed).
+class PlayerIndex:
+    def __init__(self, db=None):
+        self.db = db or Database()
+        self.stamp_file = os.getenv("INDEX_STAMP_FILE") or ".players_changed"
+        self.built_at = None
+        self.lock = threading.Lock()
+        self.rebuilding = False
+        self.data = IndexData([], [], [], [], [], [])
+
+    # Carrega os jogadores das duas tabelas em arrays novos e troca a referência no fim;
+    # as buscas em andamento continuam usando a carga anterior
+    def build(self):
+        built_at = self.stamp_time()
+        ids, vectors, positions, ages, active, info = [], [], [], [], [], []
+        for table in ('active', 'inactive'):
+            for rows in self.db.iter_players_with_attributes(table):
+                for row in rows:
+                    ids.append(row[0])
+                    positions.append(row[3])
+                    ages.append(row[5])
+                    active.append(table == 'active')
+                    info.append((row[1], row[2], row[4], float(row[6])))
+                    vectors.append([value or 0 for value in row[7:]])
+
+        self.data = IndexData(ids, vectors, positions, ages, active, info)
+        self.built_at = built_at
+
+    def stamp_time(self):
+        try:
+            return os.path.getmtime(self.stamp_file)
+        except OSError:
+            return 0
+
+    def rebuild_in_background(self):
+        try:
+            self.build()
+        finally:
+            self.rebuilding = False
+
+    # Na primeira busca carrega o índice; depois de um crawl, recarrega numa thread
+    # separada e continua respondendo com o índice anterior até a carga nova ficar pronta
+    def refresh_if_stale(self):
+        if self.built_at is None:
+            with self.lock:
+                if self.built_at is None:
+                    self.build()
+        elif self.stamp_time() > self.built_at:
+            with self.lock:
+                if self.rebuilding:
+                    return
+                self.rebuilding = True
+            threading.Thread(target=self.rebuild_in_background, daemon=True).start()
+
+    def weights_for(self, position):
+        index_of = {column: i for i, column in enumerate(ATTRIBUTE_COLUMNS)}
+        weights = np.ones(len(ATTRIBUTE_COLUMNS), dtype=np.float32)
+        for column in POSITION_ATTRIBUTES.get(position, ()):
+            weights[index_of[column]] = KEY_ATTRIBUTE_WEIGHT
+        return weights
+
+    # Avalia um perfil de pontuação de forma vetorizada para as linhas informadas
+    def score(self, data, profile_id, rows):
+        _, matrix = weight_matrix(profile_id)
+        weights = np.vstack([np.array(matrix, dtype=np.float32), np.zeros(len(ATTRIBUTE_COLUMNS), dtype=np.float32)])
+        return np.einsum('ij,ij->i', data.vectors[rows], weights[data.position_codes[rows]])
+
+    # Retorna os k jogadores mais próximos do jogador informado
+    def similar(self, player_id, k=20, position=None, max_age=None, active=None, profile_id=DEFAULT_PROFILE):
+        self.refresh_if_stale()
+        return self.nearest(self.data, player_id, k, position, max_age, active, profile_id)
+
+    def nearest(self, data, player_id, k, position, max_age, active, profile_id):
+        row = data.row_of.get(player_id)
+        if row is None:
+            return None
+
+        weights = self.weights_for(data.positions[row])
+        diff = data.vectors - data.vectors[row]
+        distances = np.sqrt((diff * diff) @ weights)
+
+        mask = np.ones(len(data.ids), dtype=bool)
+        mask[row] = False
+        if position and position != 'ANY':
+            mask &= np.isin(data.positions, POSITION_GROUPS.get(position, (position,)))
+        if max_age:
+            mask &= data.ages <= max_age
+        if active is not None:
+            mask &= data.active == active
+
+        candidates = np.flatnonzero(mask)
+        if len(candidates) > k:
+            nearest = np.argpartition(distances[candidates], k)[:k]
+            candidates = candidates[nearest]
+        candidates = candidates[np.argsort(distances[candidates])]
+        scores = self.score(data, profile_id, candidates)
+
+        results = []
+        for i, score in zip(candidates, scores):
+            club_id, name, nationality, rating = data.info[i]
+            results.append({
+                'id': int(data.ids[i]),
+                'club_id': club_id,
+                'name': name,
+                'position': data.positions[i],
+                'nationality': nationality,
+                'age': int(data.ages[i]),
+                'rating': rating,
+                'active': bool(data.active[i]),
+                'distance': round(float(distances[i]), 2),
+                'OPS': round(float(score), 2),
+            })
+        return results
@@ -0,0 +1,168 @@
+import json
+from datetime import date, datetime, timedelta
+from database.db import ATTRIBUTE_COLUMNS
+from database.scoring import POSITION_ATTRIBUTES
+
+# Evolução dos atributos dos jogadores.
+# - progression_log: snapshot dos 21 atributos de cada jogador novo ou alterado num crawl,
+#   com os atributos anteriores à mudança (temporário, escrito pelo PlayerScraper).
+# - player_progression: série compacta por jogador, em JSON:
+#   {"dates": [d0, d1, ...], "base": [21 valores em d0], "deltas": [[[coluna, delta], ...] para d1, ...]}
+# - progression_gains: ganho total (soma dos atributos) de cada passo da série, para o
+#   ranking de quem mais evoluiu num período sem decodificar as séries.
+
+def encode_series(points):
+    dates = [point_date for point_date, _ in points]
+    base = list(points[0][1])
+    deltas = []
+    for (_, previous), (_, current) in zip(points, points[1:]):
+        deltas.append([[i, new - old] for i, (old, new) in enumerate(zip(previous, current)) if new != old])
+    return json.dumps({"dates": dates, "base": base, "deltas": deltas}, separators=(',', ':'))
+
+# Retorna a série como [(data, atributos)]
+def decode_series(series):
+    data = json.loads(series)
+    state = list(data["base"])
+    points = [(data["dates"][0], tuple(state))]
+    for point_date, changes in zip(data["dates"][1:], data["deltas"]):
+        for i, delta in changes:
+            state[i] += delta
+        points.append((point_date, tuple(state)))
+    return points
+
+# Junta os snapshots novos à série; um snapshot na mesma data do último ponto o substitui
+def fold_snapshots(points, snapshots):
+    points = list(points)
+    for crawl_date, attributes in snapshots:
+        if points and points[-1][0] == crawl_date:
+            points[-1] = (crawl_date, attributes)
+        elif not points or points[-1][1] != attributes:
+            points.append((crawl_date, attributes))
+    return points
+
+# Ganho (soma dos atributos) de cada ponto em relação ao anterior; o primeiro ponto é a base
+def point_gains(points):
+    return [
+        (current_date, sum(current) - sum(previous))
+        for (_, previous), (current_date, current) in zip(points, points[1:])
+    ]
+
+def parse_attributes(value):
+    return tuple(int(attribute) for attribute in value.split(','))
+
+def day_before(value):
+    return (datetime.strptime(value, '%Y-%m-%d').date() - timedelta(days=1)).isoformat()
+
+# Junta o log de snapshots às séries compactas e o apaga; retorna quantos jogadores mudaram
+def compact_progression(db, chunk_size=1000):
+    result = db.execute_query("SELECT MAX(id) FROM progression_log")
+    max_id = result[0][0] if result and result[0][0] else 0
+    if not max_id:
+        return 0
+
+    compacted = 0
+    last_player = 0
+    while True:
+        player_ids = [row[0] for row in db.execute_query(
+            "SELECT DISTINCT player_id FROM progression_log WHERE id <= %s AND player_id > %s ORDER BY player_id LIMIT %s",
+            (max_id, last_player, chunk_size)
+        )]
+        if not player_ids:
+            break
+        last_player = player_ids[-1]
+
+        placeholders = ','.join(['%s'] * len(player_ids))
+        snapshots = {}
+        previous = {}
+        for player_id, crawl_date, attributes, previous_attributes in db.execute_query(
+            f"SELECT player_id, crawl_date, attributes, previous FROM progression_log WHERE id <= %s AND player_id IN ({placeholders}) ORDER BY player_id, id",
+            (max_id, *player_ids)
+        ):
+            snapshots.setdefault(player_id, []).append((str(crawl_date)[:10], parse_attributes(attributes)))
+            if previous_attributes and player_id not in previous:
+                previous[player_id] = parse_attributes(previous_attributes)
+
+        series = dict(db.execute_query(
+            f"SELECT player_id, series FROM player_progression WHERE player_id IN ({placeholders})", player_ids
+        ))
+
+        progression_data = []
+        gains_data = []
+        for player_id, player_snapshots in snapshots.items():
+            if player_id in series:
+                old_points = decode_series(series[player_id])
+            elif player_id in previous:
+                # Jogador sem série: os atributos anteriores à primeira mudança viram a base
+                old_points = [(day_before(player_snapshots[0][0]), previous[player_id])]
+            else:
+                old_points = []
+            points = fold_snapshots(old_points, player_snapshots)
+            progression_data.append((player_id, points[0][0], points[-1][0], encode_series(points)))
+            # Reescreve os ganhos a partir do primeiro ponto que pode ter mudado
+            first_changed = player_snapshots[0][0]
+            gains_data.extend(
+                (player_id, gain_date, gain) for gain_date, gain in point_gains(points) if gain_date >= first_changed
+            )
+
+        db.update_progression_batch(progression_data, gains_data)
+        compacted += len(progression_data)
+
+    db.execute_query("DELETE FROM progression_log WHERE id <= %s", (max_id,), fetch=False)
+    return compacted
+
+def history_query(player_id):
+    return {'sql': "SELECT series FROM player_progression WHERE player_id = %s", 'params': [player_id]}
+
+# Converte a série guardada na resposta da API
+def decode_history(player_id, series):
+    history = []
+    previous = None
+    for point_date, attributes in decode_series(series):
+        total = sum(attributes)
+        history.append({
+            'date': point_date,
+            'attributes': dict(zip(ATTRIBUTE_COLUMNS, attributes)),
+            'total': total,
+            'gain': total - previous if previous is not None else 0,
+        })
+        previous = total
+    return {'player_id': player_id, 'history': history}
+
+def parse_date(value, default):
+    try:
+        return datetime.strptime(value.strip(), '%Y-%m-%d').date()
+    except (AttributeError, ValueError):
+        return default
+
+# Lê os parâmetros do ranking de evolução (padrão: últimos 30 dias, 20 jogadores)
+def parse_improvers_args(values):
+    end = parse_date(values.get('end'), date.today())
+    start = parse_date(values.get('start'), end - timedelta(days=30))
+    k_str = values.get('k', '').strip()
+    position = values.get('position', '').strip().upper()
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'k': min(int(k_str), 1000) if k_str.isdigit() and int(k_str) > 0 else 20,
+        'position': position if position in POSITION_ATTRIBUTES else None,
+    }
+
+# Jogadores ativos que mais evoluíram entre start e end (inclusive), pelos ganhos pré-agregados
+def improvers_query(start, end, k, position=None):
+    conditions = ["g.crawl_date >= %s", "g.crawl_date <= %s"]
+    params = [start, end]
+    if position:
+        conditions.append("p.position = %s")
+        params.append(position)
+    params.append(k)
+
+    query = f"""
+    SELECT p.id, p.club_id, p.name, p.position, p.nationality, p.age, p.rating, SUM(g.gain) AS gain
+    FROM progression_gains g
+    JOIN player_active p ON p.id = g.player_id
+    WHERE {' AND '.join(conditions)}
+    GROUP BY p.id, p.club_id, p.name, p.position, p.nationality, p.age, p.rating
+    ORDER BY gain DESC
+    LIMIT %s
+    """
+    return {'sql': query, 'params': params}
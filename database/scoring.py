@@ -0,0 +1,94 @@
+import json
+import os
+import re
+from database.db import ATTRIBUTE_COLUMNS
+
+# Atributos principais de cada posição (os mesmos somados no OPS)
+POSITION_ATTRIBUTES = {
+    'GK': ('Ref', 'One', 'Hnd', 'Com', 'Psn'),
+    'DC': ('Mrk', 'Hea', 'Tck', 'Com', 'Psn'),
+    'DL': ('Crs', 'Mrk', 'Tck', 'Com', 'Psn'),
+    'DR': ('Crs', 'Mrk', 'Tck', 'Com', 'Psn'),
+    'ML': ('Crs', 'Fto', 'Pas', 'Cre', 'Psn'),
+    'MR': ('Crs', 'Fto', 'Pas', 'Cre', 'Psn'),
+    'MC': ('Lsh', 'Fto', 'Pas', 'Cre', 'Psn'),
+    'FL': ('Sht', 'Dri', 'Fto', 'Crs', 'Psn'),
+    'FR': ('Sht', 'Dri', 'Fto', 'Crs', 'Psn'),
+    'FC': ('Sht', 'Dri', 'Fto', 'Hea', 'Psn'),
+}
+
+DEFAULT_PROFILE = 'ops'
+
+# Perfil padrão: o OPS original, soma simples dos 5 atributos principais da posição
+SCORING_PROFILES = {
+    DEFAULT_PROFILE: {
+        position: {column: 1 for column in columns}
+        for position, columns in POSITION_ATTRIBUTES.items()
+    },
+}
+
+# Perfis extras (táticas de cada clube) ficam num JSON no formato
+# {"perfil": {"GK": {"Ref": 2, "One": 1.5, ...}, "DC": {...}}}
+def load_profiles(path=None):
+    path = path or os.getenv("SCORING_PROFILES_FILE") or "scoring_profiles.json"
+    if not os.path.exists(path):
+        return
+
+    with open(path) as f:
+        profiles = json.load(f)
+
+    for profile_id, weights in profiles.items():
+        if not re.fullmatch(r'\w{1,32}', profile_id):
+            raise ValueError(f"Perfil de pontuação inválido: {profile_id}")
+        for position, columns in weights.items():
+            if position not in POSITION_ATTRIBUTES:
+                raise ValueError(f"Posição inválida no perfil {profile_id}: {position}")
+            for column, weight in columns.items():
+                if column not in ATTRIBUTE_COLUMNS:
+                    raise ValueError(f"Atributo inválido no perfil {profile_id}: {column}")
+                columns[column] = float(weight)
+        SCORING_PROFILES[profile_id] = weights
+
+load_profiles()
+
+# Gera a expressão SQL do perfil, usada para manter a tabela de pontuações
+def compile_sql(profile_id, player_alias='p', attributes_alias='a'):
+    cases = []
+    for position, columns in SCORING_PROFILES[profile_id].items():
+        terms = [
+            f"{float(weight):g} * COALESCE({attributes_alias}.{column}, 0)"
+            for column, weight in columns.items()
+        ]
+        if terms:
+            cases.append(f"WHEN '{position}' THEN " + " + ".join(terms))
+    if not cases:
+        return "0"
+    return f"CASE {player_alias}.position " + " ".join(cases) + " ELSE 0 END"
+
+# Matriz de pesos (posição x atributo) do perfil, para avaliação vetorizada
+def weight_matrix(profile_id):
+    positions = list(POSITION_ATTRIBUTES)
+    matrix = []
+    for position in positions:
+        columns = SCORING_PROFILES[profile_id].get(position, {})
+        matrix.append([float(columns.get(column, 0)) for column in ATTRIBUTE_COLUMNS])
+    return positions, matrix
+
+_created_tables = set()
+
+# Mantém as pontuações guardadas de todos os perfis; com player_ids, só desses jogadores
+def refresh_scores(db, table, player_ids=None):
+    if table not in _created_tables:
+        db.create_score_table(table)
+        _created_tables.add(table)
+
+    for profile_id in SCORING_PROFILES:
+        db.refresh_scores(table, profile_id, compile_sql(profile_id), player_ids)
+
+# Depois de move_player: pontua os jogadores movidos na tabela de inativos e tira as
+# pontuações deles da tabela de origem, sem recalcular as tabelas inteiras
+def move_scores(db, active, player_ids, chunk_size=1000):
+    for i in range(0, len(player_ids), chunk_size):
+        chunk = player_ids[i:i + chunk_size]
+        refresh_scores(db, 'inactive', chunk)
+        db.delete_scores(active, chunk)
@@ -0,0 +1,141 @@
+from database.scoring import SCORING_PROFILES, DEFAULT_PROFILE
+
+VALID_POSITIONS = {
+    'GK', 'DC', 'DL', 'DR', 'ML', 'MR', 'MC', 'FL', 'FR', 'FC',
+    'DA', 'MA', 'FA', 'ANY'
+}
+
+VALID_ATTRIBUTES = {
+    'ref', 'tck', 'cre', 'sht', 'tmw', 'one', 'mrk', 'pas', 'dri',
+    'sp', 'hnd', 'hea', 'lsh', 'psn', 'str', 'com', 'crs', 'fto',
+    'agg', 'inf', 'ecc'
+}
+
+def get_profile(values):
+    profile_id = values.get('profile', DEFAULT_PROFILE)
+    return profile_id if profile_id in SCORING_PROFILES else DEFAULT_PROFILE
+
+# Lê o formulário da busca e retorna os argumentos do build_query (compartilhado entre app_mysql e app_async)
+def parse_search_form(form):
+    nationality = form.get('nationality', '').strip().lower()
+    position = form.get('position', '').strip().upper()
+    age_str = form.get('age', '').strip()
+    age = int(age_str) if age_str.isdigit() else 0
+    active = form.get('active') == 'on'
+
+    player_table = "player_active" if active else "player_inactive"
+    attributes_table = "attributes_active" if active else "attributes_inactive"
+
+    # Atributos válidos apenas
+    attributes_values = {}
+    for attr in VALID_ATTRIBUTES:
+        if attr + '_min' in form and form[attr + '_min'] != '1':
+            attributes_values[attr] = True  # presença do checkbox
+        if attr + '_max' in form and form[attr + '_max'] != '50':
+            attributes_values[attr] = True  # presença do checkbox
+
+    return {
+        'player_table': player_table,
+        'attributes_table': attributes_table,
+        'nationality': nationality,
+        'age': age,
+        'position': position,
+        'attributes_values': attributes_values,
+        'form': form,
+        'profile_id': get_profile(form),
+    }
+
+# Lê os parâmetros da busca de jogadores parecidos; retorna None se o ID for inválido
+def parse_similar_form(values):
+    player_id_str = values.get('player_id', '').strip()
+    if not player_id_str.isdigit():
+        return None
+
+    k_str = values.get('k', '').strip()
+    position = values.get('similar_position', '').strip().upper()
+    age_str = values.get('similar_age', '').strip()
+    # similar_active: on (só ativos), off (só inativos) ou any (padrão)
+    status = values.get('similar_active', 'any').strip().lower()
+    return {
+        'player_id': int(player_id_str),
+        'k': min(int(k_str), 1000) if k_str.isdigit() and int(k_str) > 0 else 20,
+        'position': position if position in VALID_POSITIONS else None,
+        'max_age': int(age_str) if age_str.isdigit() else 0,
+        'active': {'on': True, 'off': False}.get(status),
+        'profile_id': get_profile(values),
+    }
+
+# Filtros do formulário (nacionalidade, posição, idade e atributos), compartilhados com a exportação
+def build_conditions(player_table, attributes_table, nationality, age, position, attributes_values, form):
+    conditions = []
+    params = []
+
+    if nationality and nationality != 'any':
+        conditions.append(f"{player_table}.nationality = %s")
+        params.append(nationality)
+
+    if position in VALID_POSITIONS and position != 'ANY':
+        if position == 'DA':
+            conditions.append(f"{player_table}.position IN (%s, %s, %s)")
+            params.extend(['DC', 'DL', 'DR'])
+        elif position == 'MA':
+            conditions.append(f"{player_table}.position IN (%s, %s, %s)")
+            params.extend(['MC', 'ML', 'MR'])
+        elif position == 'FA':
+            conditions.append(f"{player_table}.position IN (%s, %s, %s)")
+            params.extend(['FC', 'FL', 'FR'])
+        else:
+            conditions.append(f"{player_table}.position = %s")
+            params.append(position)
+
+    if age > 0:
+        conditions.append(f"{player_table}.age <= %s")
+        params.append(age)
+
+    for field in attributes_values:
+        try:
+            min_val = int(form.get(f"{field}_min", ""))
+            conditions.append(f"{attributes_table}.{field} >= %s")
+            params.append(min_val)
+        except ValueError:
+            pass
+        try:
+            max_val = int(form.get(f"{field}_max", ""))
+            conditions.append(f"{attributes_table}.{field} <= %s")
+            params.append(max_val)
+        except ValueError:
+            pass
+
+    return conditions, params
+
+def build_query(player_table, attributes_table, nationality, age, position, attributes_values, form, profile_id=DEFAULT_PROFILE):
+    # A pontuação vem da tabela mantida pelos scrapers (ver database/scoring.py)
+    score_table = player_table.replace('player_', 'scores_', 1)
+    query = f"""
+    SELECT 
+        {player_table}.id,
+        {player_table}.club_id,
+        {player_table}.name,
+        {player_table}.position,
+        {player_table}.nationality,
+        {player_table}.age,
+        {player_table}.rating,
+        {score_table}.score AS OPS
+    FROM 
+        {score_table}
+    JOIN 
+        {player_table} ON {player_table}.id = {score_table}.id
+    LEFT JOIN 
+        {attributes_table} ON {player_table}.id = {attributes_table}.id
+    """
+
+    conditions, params = build_conditions(player_table, attributes_table, nationality, age, position, attributes_values, form)
+    conditions.insert(0, f"{score_table}.profile_id = %s")
+    params.insert(0, profile_id)
+
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+
+    query += f" ORDER BY {score_table}.score DESC LIMIT 1000"
+
+    return {'sql': query, 'params': params}
@@ -0,0 +1,119 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from database.login_manager import LoginManager  # Importa a classe LoginManager
+
+# Trechos que só aparecem na página quando o cookie não está mais logado
+LOGGED_OUT_MARKERS = ('name="do_user"', 'name="do_pass"', 'name="attemptLogin"')
+
+class SessionManager:
+    def __init__(self, cache_file=None, max_age=None):
+        self.login_manager = LoginManager()
+        self.cache_file = cache_file or os.getenv("SESSION_CACHE_FILE") or ".session_cookie.json"
+        self.max_age = max_age if max_age is not None else int(os.getenv("SESSION_MAX_AGE") or 6 * 60 * 60)
+        self.session_cookie = None
+        self.created_at = None
+        self.relogins = 0
+        self._lock = asyncio.Lock()
+
+    # Lê o cookie salvo em disco, se ainda estiver dentro da validade
+    def load_cached_cookie(self):
+        try:
+            with open(self.cache_file) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        cookie = cached.get("PHPSESSID")
+        created_at = cached.get("created_at", 0)
+        if not cookie or time.time() - created_at > self.max_age:
+            return None
+
+        self.session_cookie = cookie
+        self.created_at = created_at
+        return cookie
+
+    # Salva o cookie em disco junto com o horário do login, legível só pelo dono (0600)
+    def save_cookie(self):
+        try:
+            fd = os.open(self.cache_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            # O modo do os.open só vale na criação; corrige arquivos antigos criados com 0644
+            os.fchmod(fd, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump({"PHPSESSID": self.session_cookie, "created_at": self.created_at}, f)
+        except OSError as e:
+            logging.error(f"Não foi possível salvar o cookie em {self.cache_file}: {e}")
+
+    async def _login(self):
+        self.session_cookie = await self.login_manager.login()
+        self.created_at = time.time()
+        self.save_cookie()
+        print(f"Cookie PHPSESSID obtido: {self.session_cookie}")
+
+    # Retorna o cookie atual, reaproveitando o do disco ou fazendo login
+    async def get_cookie(self):
+        if self.session_cookie:
+            return self.session_cookie
+
+        async with self._lock:
+            if not self.session_cookie:
+                if self.load_cached_cookie():
+                    print(f"Cookie PHPSESSID reaproveitado do disco: {self.session_cookie}")
+                else:
+                    await self._login()
+        return self.session_cookie
+
+    # Refaz o login uma única vez, mesmo com várias tarefas detectando a expiração juntas
+    async def refresh(self, stale_cookie):
+        async with self._lock:
+            if self.session_cookie == stale_cookie:
+                logging.error("Sessão expirada durante a execução. Refazendo login.")
+                self.relogins += 1
+                await self._login()
+        return self.session_cookie
+
+    def is_logged_out(self, html):
+        return any(marker in html for marker in LOGGED_OUT_MARKERS)
+
+    # Busca uma página logada, refazendo o login e repetindo se a sessão tiver caído.
+    # Com parser_factory, a resposta é entregue em pedaços a um parser incremental
+    # (feed/close/logged_out) e o retorno é o resultado do parser, não o HTML.
+    async def fetch_page(self, session, url, retries=3, parser_factory=None):
+        attempt = 0
+        relogged = False
+        while attempt < retries:
+            cookie = await self.get_cookie()
+            try:
+                async with session.get(url, cookies={"PHPSESSID": cookie}, timeout=10) as response:
+                    if response.status != 200:
+                        logging.error(f"Erro ao buscar a página do clube {url}: {response.status}")
+                        return None
+                    if parser_factory:
+                        parser = parser_factory()
+                        async for chunk in response.content.iter_chunked(16 * 1024):
+                            parser.feed(chunk)
+                        result = parser.close()
+                        logged_out = parser.logged_out
+                    else:
+                        result = await response.text(errors="ignore")
+                        logged_out = self.is_logged_out(result)
+            except asyncio.TimeoutError:
+                attempt += 1
+                logging.error(f"Timeout na requisição do clube {url}, tentativa {attempt}")
+                continue
+            except Exception as e:
+                logging.error(f"Erro na requisição do clube {url}: {e}")
+                return None
+
+            if not logged_out:
+                return result
+            if relogged:
+                logging.error(f"Página {url} continua deslogada após novo login.")
+                return None
+
+            await self.refresh(cookie)
+            relogged = True
+
+        return None  # Retorna None após o número máximo de tentativas